@@ -8,19 +8,30 @@ Automates DriveCentric "claim customer", task-date adjustment and standard /
 custom text & e-mail outreach - with logging, hot-keys and auto-update support.
 """
 
-import os, sys, time, json, shutil, zipfile, io, logging, datetime, traceback
-import threading, socket, subprocess, stat
+import os, sys, time, json, shutil, zipfile, logging, logging.handlers, datetime, traceback
+_STARTUP_T0 = time.perf_counter()
+import queue, gzip, atexit, hashlib, zlib
+import threading, socket, subprocess, stat, sqlite3, functools, csv, math, string, itertools, weakref, heapq, collections
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
 from pathlib import Path
-
-try:
-    import requests, keyboard
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.keys import Keys
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-except Exception as _imp_err:
+from types import MappingProxyType
+import importlib.util
+
+# "--cli" runs an auto mode or a single action unattended (see cli_main); it
+# never imports tkinter or keyboard, so it works on a headless box.
+HEADLESS = "--cli" in sys.argv[1:]
+
+# Third-party packages are only located here; selenium is imported on the
+# first browser action (ensure_selenium), requests and websocket where used,
+# and keyboard by the hot-key thread, so the window can appear straight away.
+_REQUIRED_PACKAGES = ("selenium", "requests", "websocket") + (() if HEADLESS else ("keyboard",))
+_missing_packages = [p for p in _REQUIRED_PACKAGES if importlib.util.find_spec(p) is None]
+if _missing_packages:
+    _imp_err = f"No module named {', '.join(repr(p) for p in _missing_packages)}"
+    if HEADLESS:
+        sys.exit(f"Required module missing: {_imp_err}")
     import tkinter as _tk
     from tkinter import messagebox as _mb
     _tk.Tk().withdraw()
@@ -30,8 +41,26 @@ except Exception as _imp_err:
         "and try again.")
     sys.exit(1)
 
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog, scrolledtext
+webdriver = By = Options = Keys = WebDriverWait = EC = JavascriptException = None
+_selenium_lock = threading.Lock()
+
+def ensure_selenium():
+    global webdriver, By, Options, Keys, WebDriverWait, EC, JavascriptException
+    with _selenium_lock:
+        if webdriver is not None:
+            return
+        from selenium.common.exceptions import JavascriptException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium import webdriver
+        startup_mark("selenium imported")
+
+if not HEADLESS:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, simpledialog, scrolledtext, filedialog
 
 APP_NAME = "DriveCentricTaskClaim"
 
@@ -59,7 +88,11 @@ ALLOWED_PASSWORDS = {"Acura2025", "ADMIN"}
 
 PIN_FILE = USER_DATA_DIR / "user_pins.json"
 TEMPLATE_FILE = USER_DATA_DIR / "templates.json"
+SETTINGS_FILE = USER_DATA_DIR / "settings.json"
+LEDGER_FILE = USER_DATA_DIR / "ledger.sqlite3"
+SNAPSHOT_DIR = USER_DATA_DIR / "snapshots"
 LOG_FILENAME = USER_DATA_DIR / "drivecentric_log.txt"
+EVENT_LOG_FILENAME = USER_DATA_DIR / "events.jsonl"
 
 WATERMARK_ICON = "💠"
 WATERMARK_TEXT = "© 2024 • Developed by Aaron Wagoner"
@@ -67,10 +100,48 @@ WATERMARK_TEXT = "© 2024 • Developed by Aaron Wagoner"
 sender_name = ""
 auto_stop_event = threading.Event()
 
+# Tunables persisted in settings.json; anything missing on disk keeps these defaults.
+settings: dict[str, object] = {
+    "parallel_workers": 3,
+    # Customers whose step was already done this many hours ago or less are skipped; 0 disables.
+    "ledger_skip_hours": 72,
+    # "selenium" or "cdp": page scripts, waits and carousel clicks go straight to
+    # the DevTools socket of the attached Chrome instead of through chromedriver.
+    "transport": "selenium",
+    # Write one JSON line per stage outcome to events.jsonl.
+    "json_log": True,
+    # Add a screenshot to failure snapshots (slower; the page HTML is always kept).
+    "snapshot_screenshots": False,
+    # Index the customers ahead before an auto run, show counts and only process those that need work.
+    "prescan": False,
+    "prescan_limit": 500,
+    # Time every WebDriver command by stage, customer and calling function.
+    "profile_webdriver": False,
+    # Auto modes pause this long (s) between customers at full speed; the send-rate
+    # governor widens the pause while stages fail or slow down.
+    "min_gap": 0.0,
+    "max_error_rate": 0.2,
+    # Most successful claims / e-mails / texts per rolling hour; 0 means no cap.
+    "hourly_caps": {"claim": 0, "email": 0, "text": 0},
+    # Tries per step before it counts as failed. Sends get one: a send that
+    # errored may still have gone out, and must never be repeated.
+    "step_attempts": {"claim": 3, "task": 3, "email": 1, "text": 1},
+    # Outer-loop errors tolerated on one customer before it is skipped.
+    "customer_attempts": 3,
+    # Chrome processes "Launch Chrome" starts, on consecutive debugging ports.
+    "chrome_instances": 1,
+    # Auto modes sample the tab's memory every this many customers (0 = never)
+    # and reload or replace the tab when it passes any of the limits.
+    "memory_check_every": 5,
+    "max_js_heap_mb": 1024,
+    "max_dom_nodes": 200000,
+    "max_js_listeners": 100000,
+}
+
 # Default templates dictionary with placeholders for personalization
 # It includes text and email templates for standard and custom outreach
 
-templates: dict[str, str] = {
+DEFAULT_TEMPLATES: dict[str, str] = {
     "standard_text":
         "Hello, {customer_name}! This is {sender_name} with Acura of Springfield. "
         "Just wanted to check in - we've got strong offers and fresh inventory "
@@ -136,14 +207,85 @@ templates: dict[str, str] = {
         "Best,\n{sender_name}"
 }
 
-logging.basicConfig(
-    filename=str(LOG_FILENAME),
-    level=logging.INFO,
-    filemode="a",
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# ---- Startup timing ----
+_startup_marks: list[tuple[str, float]] = []
+
+def startup_mark(label: str):
+    _startup_marks.append((label, time.perf_counter() - _STARTUP_T0))
+
+def log_startup_report():
+    marks = sorted(_startup_marks, key=lambda m: m[1])
+    gui_print("Startup (ms since launch): " + ", ".join(f"{label} {t * 1000:.0f}" for label, t in marks))
+
+startup_mark("imports")
+
+# ---- Logging ----
+# Callers only put records on a queue; a QueueListener thread does the file
+# writes. Both files roll over at LOG_MAX_BYTES or when the day changes, and
+# rolled segments are gzipped. Stage outcomes (log_event) go only to the
+# JSON-lines file, which is cheap to load into anything for analysis.
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 14
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+class DailyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    def __init__(self, filename: Path):
+        super().__init__(filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                         encoding="utf-8", delay=True)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = _gzip_rotator
+        try:
+            self._day = datetime.date.fromtimestamp(os.path.getmtime(filename))
+        except OSError:
+            self._day = datetime.date.today()
+
+    def shouldRollover(self, record) -> bool:
+        day = datetime.date.fromtimestamp(record.created)
+        if day != self._day:
+            self._day = day
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+        return bool(super().shouldRollover(record))
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        ts = datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")
+        return json.dumps({"ts": ts, **record.event}, ensure_ascii=False)
+
+def _is_event(record) -> bool:
+    return hasattr(record, "event")
+
+def setup_logging() -> logging.handlers.QueueListener:
+    text = DailyRotatingFileHandler(LOG_FILENAME)
+    text.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    text.addFilter(lambda r: not _is_event(r))
+    events = DailyRotatingFileHandler(EVENT_LOG_FILENAME)
+    events.setFormatter(_JsonLineFormatter())
+    events.addFilter(_is_event)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, text, events)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+_log_listener = setup_logging()
 logger = logging.getLogger("drivecentric")
+events_logger = logging.getLogger("drivecentric.events")
 logger.info("Program started.")
+startup_mark("logging")
+
+def log_event(**fields):
+    if settings.get("json_log", True):
+        events_logger.info(fields.get("stage", "event"), extra={"event": fields})
+    if console_mode == "json":
+        _console_write("event", **fields)
 
 root: tk.Tk | None = None
 log_text: scrolledtext.ScrolledText | None = None
@@ -154,46 +296,241 @@ def fatal_popup(msg: str):
     messagebox.showerror("Fatal Error", msg)
     sys.exit(1)
 
+# Worker threads set .prefix (e.g. "[Tab 2] ") so their lines can be told apart.
+_log_ctx = threading.local()
+
+# Log lines and status updates from any thread are buffered here and drawn by
+# the Tk thread every LOG_FLUSH_MS in one insert. The widget keeps only the
+# last LOG_MAX_LINES lines; the full history is in the log file.
+LOG_FLUSH_MS = 100
+LOG_MAX_LINES = 2000
+_gui_lock = threading.Lock()
+_gui_lines: collections.deque[str] = collections.deque(maxlen=LOG_MAX_LINES)
+_gui_overflow = 0
+_gui_status: str | None = None
+# Callables worker threads hand to the Tk thread (dialogs, quit); run by _flush_gui.
+_gui_calls: collections.deque[tuple[Callable, dict, threading.Event]] = collections.deque()
+# Set by the CLI: "text" or "json" sends log lines, status and events to stdout.
+console_mode: str | None = None
+
+def _console_write(kind: str, **fields):
+    if console_mode == "json":
+        fields = {"ts": datetime.datetime.now().isoformat(timespec="seconds"), "type": kind, **fields}
+        print(json.dumps(fields, ensure_ascii=False), flush=True)
+    elif kind == "log":
+        print(fields["message"], flush=True)
+
+def run_on_tk(fn: Callable, wait: bool = True):
+    # From a worker thread: run fn on the Tk thread at the next flush and,
+    # with wait, block for its result (None if it raised).
+    box, done = {}, threading.Event()
+    _gui_calls.append((fn, box, done))
+    if wait:
+        done.wait()
+        return box.get("value")
+
+def set_status(text: str):
+    global _gui_status
+    if console_mode:
+        if console_mode == "json":
+            _console_write("status", status=text)
+        return
+    with _gui_lock:
+        _gui_status = text
+
 def gui_print(message: str, status: str | None = None):
+    global _gui_overflow
+    prefix = getattr(_log_ctx, "prefix", "")
+    if prefix and message.strip():
+        message = prefix + message.lstrip("\n")
     ts = datetime.datetime.now().strftime("%H:%M:%S")
     line = f"[{ts}] {message}\n"
     logger.info(message)
-    if status and status_var is not None:
-        status_var.set(status)
-    if root and log_text and log_text.winfo_exists():
-        def _append():
+    if console_mode:
+        _console_write("log", message=line.rstrip("\n") if console_mode == "text" else message)
+        if status:
+            set_status(status)
+        return
+    with _gui_lock:
+        if len(_gui_lines) == _gui_lines.maxlen:
+            _gui_overflow += 1
+        _gui_lines.append(line)
+    if status:
+        set_status(status)
+
+def _flush_gui():
+    global _gui_overflow, _gui_status
+    with _gui_lock:
+        lines, skipped, status = list(_gui_lines), _gui_overflow, _gui_status
+        _gui_lines.clear()
+        _gui_overflow, _gui_status = 0, None
+    try:
+        if lines and log_text is not None:
+            if skipped:
+                lines.insert(0, f"... {skipped} earlier lines not shown; see {LOG_FILENAME.name} ...\n")
             log_text.configure(state="normal")
-            log_text.insert(tk.END, line)
+            log_text.insert(tk.END, "".join(lines))
+            excess = int(log_text.index("end-1c").split(".")[0]) - LOG_MAX_LINES
+            if excess > 0:
+                log_text.delete("1.0", f"{excess + 1}.0")
             log_text.see(tk.END)
             log_text.configure(state="disabled")
-        try:
-            root.after(0, _append)
-        except Exception:
-            pass
+        if status is not None and status_var is not None:
+            status_var.set(status)
+        while _gui_calls:
+            fn, box, done = _gui_calls.popleft()
+            try:
+                box["value"] = fn()
+            except Exception as exc:
+                logger.warning(f"GUI call failed: {exc}")
+            finally:
+                done.set()
+    finally:
+        if root is not None:
+            root.after(LOG_FLUSH_MS, _flush_gui)
+
+# ---- Templates ----
+# Templates are validated once (on load, on save, or when templates.json
+# changes on disk) and published as an immutable snapshot. Senders only ever
+# read the current snapshot, so the editor can't change a template half-way
+# through a send and a bad placeholder is rejected before any run uses it.
+TEMPLATE_FIELDS = frozenset({"customer_name", "sender_name"})
+TEMPLATE_RELOAD_INTERVAL = 2.0
+
+class TemplateError(ValueError):
+    pass
+
+def validate_template(key: str, text: str):
+    if not isinstance(text, str):
+        raise TemplateError(f"{key}: template must be text.")
+    try:
+        for _, field_name, _, _ in string.Formatter().parse(text):
+            if field_name is not None and field_name not in TEMPLATE_FIELDS:
+                raise TemplateError(
+                    f"{key}: unknown placeholder {{{field_name}}} "
+                    f"(allowed: {', '.join('{%s}' % f for f in sorted(TEMPLATE_FIELDS))}).")
+        text.format(customer_name="Test", sender_name="Test")
+    except TemplateError:
+        raise
+    except (ValueError, IndexError, KeyError) as exc:
+        raise TemplateError(f"{key}: {exc}") from None
+
+class TemplateSnapshot:
+    def __init__(self, raw: dict[str, str], mtime: float | None = None):
+        self._raw = MappingProxyType(dict(raw))
+        self.mtime = mtime
+
+    def __getitem__(self, key: str) -> str:
+        return self._raw[key]
+
+    def get(self, key: str, default: str = "") -> str:
+        return self._raw.get(key, default)
+
+    def items(self):
+        return self._raw.items()
+
+    def as_dict(self) -> dict[str, str]:
+        return dict(self._raw)
+
+    def render(self, key: str, customer_name: str) -> str:
+        return self._raw[key].format(customer_name=customer_name, sender_name=sender_name)
+
+_templates_snapshot = TemplateSnapshot(DEFAULT_TEMPLATES)
+_templates_lock = threading.Lock()
+_templates_checked = 0.0
+
+def _template_file_mtime() -> float | None:
+    try:
+        return TEMPLATE_FILE.stat().st_mtime
+    except OSError:
+        return None
 
-def load_templates():
-    global templates
+def get_templates(force_check: bool = False) -> TemplateSnapshot:
+    global _templates_checked
+    now = time.monotonic()
+    if force_check or now - _templates_checked >= TEMPLATE_RELOAD_INTERVAL:
+        _templates_checked = now
+        mtime = _template_file_mtime()
+        if mtime is not None and mtime != _templates_snapshot.mtime:
+            load_templates()
+    return _templates_snapshot
+
+def render_template(key: str, customer_name: str) -> str:
+    return get_templates().render(key, customer_name)
+
+def load_templates() -> list[str]:
+    global _templates_snapshot
     if not TEMPLATE_FILE.is_file():
-        save_templates()
+        save_templates(DEFAULT_TEMPLATES)
+        return []
+    with _templates_lock:
+        mtime = _template_file_mtime()
+        try:
+            with TEMPLATE_FILE.open("r", encoding="utf-8") as fp:
+                disk = json.load(fp)
+        except Exception as exc:
+            gui_print(f"Template load error: {exc}", status="Template load error")
+            _templates_snapshot = TemplateSnapshot(_templates_snapshot.as_dict(), mtime)
+            return [str(exc)]
+        if not isinstance(disk, dict):
+            logger.warning("Template file invalid format; not a dict, using defaults.")
+            _templates_snapshot = TemplateSnapshot(_templates_snapshot.as_dict(), mtime)
+            return ["not a dict"]
+        merged = _templates_snapshot.as_dict()
+        errors = []
+        for key, text in disk.items():
+            try:
+                validate_template(key, text)
+                merged[key] = text
+            except TemplateError as exc:
+                errors.append(str(exc))
+        for err in errors:
+            gui_print(f"Template rejected, keeping previous version - {err}", status="Template error")
+        _templates_snapshot = TemplateSnapshot(merged, mtime)
+        logger.info("Templates loaded & merged.")
+        return errors
+
+def save_templates(new: dict[str, str] | None = None) -> list[str]:
+    global _templates_snapshot
+    new = dict(new if new is not None else _templates_snapshot.as_dict())
+    errors = []
+    for key, text in new.items():
+        try:
+            validate_template(key, text)
+        except TemplateError as exc:
+            errors.append(str(exc))
+    if errors:
+        return errors
+    with _templates_lock:
+        try:
+            with TEMPLATE_FILE.open("w", encoding="utf-8") as fp:
+                json.dump(new, fp, indent=4, ensure_ascii=False)
+            _templates_snapshot = TemplateSnapshot(new, _template_file_mtime())
+            gui_print("Templates saved.", status="Templates saved")
+        except Exception as exc:
+            gui_print(f"Could not save templates: {exc}", status="Template save error")
+            return [str(exc)]
+    return []
+
+def load_settings():
+    if not SETTINGS_FILE.is_file():
         return
     try:
-        with TEMPLATE_FILE.open("r", encoding="utf-8") as fp:
+        with SETTINGS_FILE.open("r", encoding="utf-8") as fp:
             disk = json.load(fp)
         if isinstance(disk, dict):
-            templates.update(disk)
-            logger.info("Templates loaded & merged.")
+            settings.update(disk)
         else:
-            logger.warning("Template file invalid format; not a dict, using defaults.")
+            logger.warning("Settings file invalid format; not a dict, using defaults.")
     except Exception as exc:
-        gui_print(f"Template load error: {exc}", status="Template load error")
+        logger.warning(f"Settings load error: {exc}")
 
-def save_templates():
+def save_settings():
     try:
-        with TEMPLATE_FILE.open("w", encoding="utf-8") as fp:
-            json.dump(templates, fp, indent=4, ensure_ascii=False)
-        gui_print("Templates saved.", status="Templates saved")
+        with SETTINGS_FILE.open("w", encoding="utf-8") as fp:
+            json.dump(settings, fp, indent=4)
     except Exception as exc:
-        gui_print(f"Could not save templates: {exc}", status="Template save error")
+        gui_print(f"Could not save settings: {exc}")
 
 def load_pins():
     try:
@@ -209,6 +546,197 @@ def save_pins(pins: dict):
     except Exception:
         pass
 
+# ---- Per-stage latency instrumentation ----
+# Each automation stage is timed and collected per run, so the GUI (or an
+# export) can show where the seconds per customer actually go.
+STAGES = ("attach", "claim", "task", "email", "text", "advance", "scan", "jump")
+# Histogram bucket upper bounds in seconds; the last bucket is open-ended.
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+def _percentile(sorted_vals: list[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_vals)))
+    return sorted_vals[rank - 1]
+
+class StageStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, run: str = ""):
+        with self._lock:
+            self.run = run
+            self.started = datetime.datetime.now()
+            self._samples: dict[str, list[float]] = {}
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict[str, dict]:
+        with self._lock:
+            samples = {k: sorted(v) for k, v in self._samples.items()}
+        out = {}
+        for stage in sorted(samples, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s)):
+            vals = samples[stage]
+            buckets = [0] * (len(STAGE_BUCKETS) + 1)
+            for v in vals:
+                buckets[next((i for i, b in enumerate(STAGE_BUCKETS) if v <= b), len(STAGE_BUCKETS))] += 1
+            out[stage] = {
+                "count": len(vals),
+                "total": sum(vals),
+                "mean": sum(vals) / len(vals),
+                "p50": _percentile(vals, 50),
+                "p95": _percentile(vals, 95),
+                "p99": _percentile(vals, 99),
+                "max": vals[-1],
+                "histogram": buckets,
+            }
+        return out
+
+    def export_json(self, path: Path | str):
+        data = {
+            "run": self.run,
+            "started": self.started.isoformat(timespec="seconds"),
+            "buckets": list(STAGE_BUCKETS),
+            "stages": self.summary(),
+        }
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, indent=2)
+
+    def export_csv(self, path: Path | str):
+        labels = [f"le_{b:g}s" for b in STAGE_BUCKETS] + [f"gt_{STAGE_BUCKETS[-1]:g}s"]
+        with open(path, "w", encoding="utf-8", newline="") as fp:
+            w = csv.writer(fp)
+            w.writerow(["stage", "count", "mean", "p50", "p95", "p99", "max", *labels])
+            for stage, st in self.summary().items():
+                w.writerow([stage, st["count"], *(f"{st[k]:.3f}" for k in ("mean", "p50", "p95", "p99", "max")),
+                            *st["histogram"]])
+
+stage_stats = StageStats()
+
+# Per-thread stage stack and current customer, read by the command profiler.
+_trace_ctx = threading.local()
+
+@contextmanager
+def stage_timer(stage: str):
+    stack = _trace_ctx.__dict__.setdefault("stages", [])
+    stack.append(stage)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_stats.add(stage, time.perf_counter() - t0)
+        stack.pop()
+
+def timed_stage(stage: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            with stage_timer(stage):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+# ---- WebDriver command profiler ----
+# With settings["profile_webdriver"] on, every command a driver sends is timed
+# (element methods such as click or get_attribute go through the same
+# driver.execute) and charged to the current stage, customer and the chain of
+# functions in this file that issued it. export_folded writes collapsed stacks
+# ("stage;caller;...;command microseconds") for flamegraph.pl or speedscope.
+_PROFILE_SKIP_FRAMES = {"wrapper", "_profiled_execute", "_caller_frames"}
+
+class CommandProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stacks: collections.Counter[str] = collections.Counter()
+            self._commands: dict[tuple[str, str], list] = {}
+            self._customers: dict[str, list] = {}
+
+    def record(self, command: str, seconds: float, frames: tuple[str, ...], stage: str, customer: str):
+        with self._lock:
+            self._stacks[";".join((stage, *frames, command))] += round(seconds * 1e6)
+            for bucket in (self._commands.setdefault((stage, command), [0, 0.0]),
+                           self._customers.setdefault(customer, [0, 0.0])):
+                bucket[0] += 1
+                bucket[1] += seconds
+
+    def summary(self) -> dict:
+        with self._lock:
+            commands = sorted(self._commands.items(), key=lambda kv: -kv[1][1])
+            customers = dict(self._customers)
+        return {
+            "commands": [{"stage": st, "command": cmd, "count": n, "seconds": round(t, 4)}
+                         for (st, cmd), (n, t) in commands],
+            "customers": {c: {"count": n, "seconds": round(t, 4)} for c, (n, t) in customers.items()},
+        }
+
+    def export_folded(self, path: Path | str):
+        with self._lock:
+            lines = [f"{stack} {us}" for stack, us in sorted(self._stacks.items()) if us > 0]
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+    def export_json(self, path: Path | str):
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(self.summary(), fp, indent=2)
+
+command_profiler = CommandProfiler()
+
+def _caller_frames() -> tuple[str, ...]:
+    names = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename == __file__ and code.co_name not in _PROFILE_SKIP_FRAMES:
+            names.append(code.co_name)
+        frame = frame.f_back
+    return tuple(reversed(names))
+
+def instrument_driver(driver):
+    execute = driver.execute
+    def _profiled_execute(command, params=None):
+        if not settings["profile_webdriver"]:
+            return execute(command, params)
+        frames = _caller_frames()
+        t0 = time.perf_counter()
+        try:
+            return execute(command, params)
+        finally:
+            stages = getattr(_trace_ctx, "stages", None)
+            command_profiler.record(command, time.perf_counter() - t0, frames,
+                                    stages[-1] if stages else "-",
+                                    getattr(_trace_ctx, "customer", None) or "-")
+    driver.execute = _profiled_execute
+    return driver
+
+def begin_stats_run(run: str):
+    # Tagged with the transport so Selenium and DevTools runs can be compared.
+    stage_stats.reset(f"{run} [{settings['transport']}]")
+    command_profiler.reset()
+
+def log_stage_summary():
+    summary = stage_stats.summary()
+    if not summary:
+        return
+    gui_print(f"Stage timings for {stage_stats.run or 'this run'} (p50 / p95 / p99 s):")
+    for stage, st in summary.items():
+        gui_print(f"  {stage:<8} n={st['count']:<4} {st['p50']:.2f} / {st['p95']:.2f} / {st['p99']:.2f}")
+    if send_governor.backoffs:
+        gui_print(f"Send-rate governor slowed down {send_governor.backoffs} time(s); "
+                  f"final pause {send_governor.gap:.1f}s.")
+    prof = command_profiler.summary()
+    customers = [v for c, v in prof["customers"].items() if c != "-"]
+    if customers:
+        gui_print(f"WebDriver round trips: {sum(v['count'] for v in customers) / len(customers):.1f} per customer. Top:")
+        for row in prof["commands"][:5]:
+            gui_print(f"  {row['stage']:<8} {row['command']:<24} n={row['count']:<5} {row['seconds']:.2f}s")
+
 def is_port_in_use(port: int, host: str = "127.0.0.1") -> bool:
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         try:
@@ -248,60 +776,387 @@ def get_chrome_path() -> str:
         return custom
     fatal_popup("Google Chrome is required. Exiting.")
 
+# ---- Chrome fleet ----
+# "Launch Chrome" starts settings["chrome_instances"] Chromes, each on its own
+# debugging port (CHROME_BASE_PORT + i) with its own profile directory, so each
+# keeps its DriveCentric login across restarts. A watchdog thread restarts any
+# Chrome it started that crashes (exits non-zero), or that stops answering
+# /json/version FLEET_HANG_STRIKES checks in a row. A Chrome the user closes
+# (exit code 0), or one that was already running, is left alone. Instance 1
+# is the Chrome manual actions attach to; parallel auto-process spreads its
+# tabs across every live instance.
+CHROME_BASE_PORT = 9222
+CHROME_PROFILE_DIR = r"C:\TempChromeProfile"
+FLEET_CHECK_INTERVAL = 15.0
+FLEET_HANG_TIMEOUT = 5.0
+FLEET_HANG_STRIKES = 2
+
+@dataclass
+class ChromeInstance:
+    index: int
+    port: int
+    profile: str
+    # None when the Chrome on this port was not started by us, or was closed by the user.
+    proc: subprocess.Popen | None = None
+    restarts: int = 0
+    strikes: int = 0
+
+    @property
+    def label(self) -> str:
+        return f"Chrome {self.index + 1} (port {self.port})"
+
+class ChromeFleet:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.instances: list[ChromeInstance] = []
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def _spawn(self, inst: ChromeInstance, restore: bool = False):
+        cmd = [get_chrome_path(), f"--remote-debugging-port={inst.port}",
+               f"--user-data-dir={inst.profile}", "--no-first-run", "--no-default-browser-check"]
+        if restore:
+            cmd.append("--restore-last-session")
+        inst.proc = subprocess.Popen(cmd)
+        inst.strikes = 0
+
+    def launch(self, count: int) -> list[ChromeInstance]:
+        started = []
+        with self._lock:
+            for i in range(count):
+                if i == len(self.instances):
+                    profile = CHROME_PROFILE_DIR if i == 0 else f"{CHROME_PROFILE_DIR}-{i + 1}"
+                    self.instances.append(ChromeInstance(i, CHROME_BASE_PORT + i, profile))
+                inst = self.instances[i]
+                if is_port_in_use(inst.port):
+                    continue
+                self._spawn(inst)
+                started.append(inst)
+            if self._watchdog is None or not self._watchdog.is_alive():
+                self._stop.clear()
+                self._watchdog = threading.Thread(target=self._watch, name="chrome-fleet", daemon=True)
+                self._watchdog.start()
+        deadline = time.monotonic() + 15
+        while any(not is_port_in_use(inst.port) for inst in started) and time.monotonic() < deadline:
+            time.sleep(0.2)
+        return started
+
+    def _probe(self, inst: ChromeInstance) -> str:
+        import requests
+        try:
+            requests.get(f"http://127.0.0.1:{inst.port}/json/version",
+                         timeout=FLEET_HANG_TIMEOUT).raise_for_status()
+            return "ok"
+        except requests.ConnectionError:
+            return "not listening"
+        except Exception:
+            return "not responding"
+
+    def check(self):
+        with self._lock:
+            instances = [inst for inst in self.instances if inst.proc is not None]
+        for inst in instances:
+            code = inst.proc.poll()
+            if code == 0:
+                gui_print(f"{inst.label} was closed; not restarting it (Launch Chrome starts it again).")
+                inst.proc = None
+                continue
+            if code is None:
+                health = self._probe(inst)
+                if health == "ok":
+                    inst.strikes = 0
+                    continue
+                inst.strikes += 1
+                if inst.strikes < FLEET_HANG_STRIKES:
+                    continue
+                inst.proc.kill()
+                inst.proc.wait(timeout=10)
+            else:
+                health = f"crashed (exit code {code})"
+            with self._lock:
+                try:
+                    self._spawn(inst, restore=True)
+                except Exception as exc:
+                    inst.proc = None
+                    gui_print(f"{inst.label} {health}; restart failed: {exc}", status="Chrome error")
+                    continue
+                inst.restarts += 1
+            gui_print(f"{inst.label} {health}; restarted ({inst.restarts} so far).", status="Chrome restarted")
+
+    def _watch(self):
+        while not self._stop.wait(FLEET_CHECK_INTERVAL):
+            try:
+                self.check()
+            except Exception as exc:
+                logger.warning(f"Chrome fleet check failed: {exc}")
+
+    def stop(self):
+        self._stop.set()
+
+    def live_ports(self) -> list[int]:
+        with self._lock:
+            ports = [inst.port for inst in self.instances] or [CHROME_BASE_PORT]
+        return [p for p in ports if is_port_in_use(p)]
+
+chrome_fleet = ChromeFleet()
+
 def launch_chrome():
-    chrome_path = get_chrome_path()
-    user_data_dir = r"C:\TempChromeProfile"
-    cmd = [
-        chrome_path,
-        "--remote-debugging-port=9222",
-        f"--user-data-dir={user_data_dir}"
-    ]
+    count = max(1, int(settings["chrome_instances"]))
     try:
-        subprocess.Popen(cmd)
+        started = chrome_fleet.launch(count)
+    except Exception as exc:
+        gui_print(f"Could not launch Chrome: {exc}", status="Chrome error")
+        return
+    if not started:
+        gui_print("Chrome is already running on every debugging port.", status="Chrome launched")
+    elif count == 1:
         gui_print(
             "Chrome launched. Log into DriveCentric, then open a customer in a new tab/window if needed.",
             status="Chrome launched")
-        time.sleep(1)
-    except Exception as exc:
-        gui_print(f"Could not launch Chrome: {exc}", status="Chrome error")
+    else:
+        gui_print(f"{len(started)} Chrome window(s) launched on ports "
+                  f"{', '.join(str(inst.port) for inst in started)}. Log into DriveCentric in each once; "
+                  "their profiles keep the login.", status="Chrome launched")
+
+DRIVECENTRIC_URL_KEYWORDS = ("drivecentric", "dealer", "crm")
 
-def _find_and_switch_to_drivecentric_tab(driver):
-    keywords = ["drivecentric", "dealer", "crm"]
+def _is_drivecentric_url(url: str) -> bool:
+    url = (url or "").lower()
+    return any(kw in url for kw in DRIVECENTRIC_URL_KEYWORDS)
+
+def _find_and_switch_to_drivecentric_tab(driver) -> str | None:
     for handle in driver.window_handles:
         try:
             driver.switch_to.window(handle)
-            url = driver.current_url
-            for kw in keywords:
-                if kw in url.lower():
-                    return True
+            if _is_drivecentric_url(driver.current_url):
+                return handle
         except Exception:
             continue
-    return False
+    return None
+
+# ---- Persistent browser session ----
+# One attached driver is kept for the life of the program. Each action only
+# pays a single current_url round trip to prove the session and tab are still
+# alive; the port probe, driver construction and tab scan happen only when the
+# session is actually gone.
+_session_lock = threading.RLock()
+_session_driver = None
+_session_handle: str | None = None
+
+def _report_tab_not_found():
+    gui_print(
+        "DriveCentric tab not found. "
+        "Please make sure you have DriveCentric open in one of the tabs/windows in Chrome "
+        f"(with --remote-debugging-port={CHROME_BASE_PORT} enabled). "
+        "Then re-try your action after opening/selecting the correct customer tab.",
+        status="Open customer tab in Chrome"
+    )
 
-def get_chrome_driver():
-    if not is_port_in_use(9222):
-        gui_print("Remote debugging port 9222 not open. Click 'Launch Chrome' first.",
-                  status="Chrome not attached")
+def _session_state(driver) -> str:
+    # "ok": attached to a DriveCentric tab; "tab": session alive but the tab
+    # closed or navigated away; "dead": chromedriver or Chrome is gone.
+    try:
+        if _is_drivecentric_url(driver.current_url):
+            return "ok"
+    except Exception:
+        pass
+    try:
+        driver.window_handles
+        return "tab"
+    except Exception:
+        return "dead"
+
+# driver -> debugging port of the Chrome it is attached to.
+_driver_ports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+def _attach_new_driver(quiet: bool = False, port: int = CHROME_BASE_PORT):
+    if not is_port_in_use(port):
+        if not quiet:
+            gui_print(f"Remote debugging port {port} not open. Click 'Launch Chrome' first.",
+                      status="Chrome not attached")
         return None
+    ensure_selenium()
     opts = Options()
-    opts.debugger_address = "127.0.0.1:9222"
+    opts.debugger_address = f"127.0.0.1:{port}"
     try:
-        driver = webdriver.Chrome(options=opts)
+        drv = instrument_driver(webdriver.Chrome(options=opts))
     except Exception as exc:
         gui_print(f"Cannot attach to Chrome: {exc}", status="Chrome attach error")
         return None
-    found = _find_and_switch_to_drivecentric_tab(driver)
-    if not found:
-        gui_print(
-            "DriveCentric tab not found. "
-            "Please make sure you have DriveCentric open in one of the tabs/windows in Chrome "
-            "(with --remote-debugging-port=9222 enabled). "
-            "Then re-try your action after opening/selecting the correct customer tab.",
-            status="Open customer tab in Chrome"
-        )
-        driver.quit()
+    _driver_ports[drv] = port
+    return drv
+
+def warm_up_browser():
+    # Background start-up: import selenium and, if Chrome is already listening,
+    # attach now so the first button press doesn't pay for chromedriver.
+    global _session_driver
+    ensure_selenium()
+    with _session_lock:
+        if _session_driver is None:
+            _session_driver = _attach_new_driver(quiet=True)
+            if _session_driver is not None:
+                startup_mark("driver attached")
+
+def close_chrome_session():
+    global _session_driver, _session_handle
+    with _session_lock:
+        drv, _session_driver, _session_handle = _session_driver, None, None
+    if drv is not None:
+        drop_cdp_session(drv)
+        try:
+            drv.quit()
+        except Exception:
+            pass
+
+@timed_stage("attach")
+def get_chrome_driver():
+    global _session_driver, _session_handle
+    with _session_lock:
+        if _session_driver is not None:
+            state = _session_state(_session_driver)
+            if state == "ok":
+                # warm_up_browser attaches without picking a tab; the tab it is on is the one.
+                if _session_handle is None:
+                    _session_handle = _session_driver.current_window_handle
+                return _session_driver
+            if state == "dead":
+                logger.info("Chrome session lost; re-attaching.")
+                close_chrome_session()
+        if _session_driver is None:
+            _session_driver = _attach_new_driver()
+            if _session_driver is None:
+                return None
+        drop_cdp_session(_session_driver)
+        _session_handle = _find_and_switch_to_drivecentric_tab(_session_driver)
+        if _session_handle is None:
+            _report_tab_not_found()
+            return None
+        return _session_driver
+
+# ---- DevTools fast path ----
+# With settings["transport"] == "cdp", scripts that take only plain values
+# (page probe, readiness waits, carousel click, e-mail body fill) are run with
+# Runtime.evaluate over a websocket to the tab's DevTools target, skipping the
+# chromedriver HTTP hop. Scripts that take element handles, and anything
+# that fails before reaching the socket, go through Selenium as before.
+CDP_RETRY_AFTER = 30.0
+
+class CdpUnavailable(Exception):
+    pass
+
+class CdpSession:
+    def __init__(self, target_id: str, port: int = CHROME_BASE_PORT):
+        url = f"ws://127.0.0.1:{port}/devtools/page/{target_id}"
+        import requests
+        try:
+            for t in requests.get(f"http://127.0.0.1:{port}/json/list", timeout=2).json():
+                if t.get("id") == target_id and t.get("webSocketDebuggerUrl"):
+                    url = t["webSocketDebuggerUrl"]
+                    break
+            import websocket
+            self._ws = websocket.create_connection(url, timeout=5, suppress_origin=True)
+        except Exception as exc:
+            raise CdpUnavailable(f"cannot open DevTools socket: {exc}") from None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def call(self, method: str, params: dict, timeout: float = 10.0) -> dict:
+        with self._lock:
+            msg_id = next(self._ids)
+            try:
+                self._ws.settimeout(timeout)
+                self._ws.send(json.dumps({"id": msg_id, "method": method, "params": params}))
+            except Exception as exc:
+                self.close()
+                raise CdpUnavailable(f"send failed: {exc}") from None
+            # Past this point the command may have run, so errors are not retried via Selenium.
+            try:
+                while True:
+                    msg = json.loads(self._ws.recv())
+                    if msg.get("id") == msg_id:
+                        break
+            except Exception:
+                self.close()
+                raise
+        if "error" in msg:
+            raise JavascriptException(msg["error"].get("message", str(msg["error"])))
+        return msg["result"]
+
+    def run(self, body: str, args: tuple, is_async: bool = False, timeout: float = 10.0):
+        fn = f"(function() {{{body}\n}})"
+        argv = json.dumps(list(args))
+        if is_async:
+            expr = f"new Promise(done => {fn}.apply(null, {argv}.concat([done])))"
+        else:
+            expr = f"{fn}.apply(null, {argv})"
+        res = self.call("Runtime.evaluate", {"expression": expr, "returnByValue": True,
+                                             "awaitPromise": is_async, "userGesture": True},
+                        timeout=timeout)
+        if "exceptionDetails" in res:
+            det = res["exceptionDetails"]
+            raise JavascriptException(det.get("exception", {}).get("description") or det.get("text", "script error"))
+        return res["result"].get("value")
+
+    @property
+    def closed(self) -> bool:
+        return not self._ws.connected
+
+    def close(self):
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+
+# driver -> CdpSession, or the monotonic time before which not to retry.
+_cdp_sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_cdp_lock = threading.Lock()
+
+def cdp_session(driver) -> CdpSession | None:
+    if settings["transport"] != "cdp":
         return None
-    return driver
+    with _cdp_lock:
+        sess = _cdp_sessions.get(driver)
+        if isinstance(sess, CdpSession) and not sess.closed:
+            return sess
+        if isinstance(sess, float) and time.monotonic() < sess:
+            return None
+        try:
+            sess = CdpSession(driver.current_window_handle, _driver_ports.get(driver, CHROME_BASE_PORT))
+        except Exception as exc:
+            logger.info(f"DevTools fast path unavailable ({exc}); using Selenium.")
+            _cdp_sessions[driver] = time.monotonic() + CDP_RETRY_AFTER
+            return None
+        _cdp_sessions[driver] = sess
+        return sess
+
+def drop_cdp_session(driver):
+    with _cdp_lock:
+        sess = _cdp_sessions.pop(driver, None)
+    if isinstance(sess, CdpSession):
+        sess.close()
+
+def _plain_args(args) -> bool:
+    return all(a is None or isinstance(a, (str, int, float, bool)) for a in args)
+
+def page_script(driver, js: str, *args):
+    sess = cdp_session(driver) if _plain_args(args) else None
+    if sess is not None:
+        try:
+            return sess.run(js, args)
+        except CdpUnavailable as exc:
+            logger.debug(f"DevTools fast path failed: {exc}; using Selenium.")
+            drop_cdp_session(driver)
+    return driver.execute_script(js, *args)
+
+def page_async_script(driver, js: str, timeout: float, *args):
+    sess = cdp_session(driver) if _plain_args(args) else None
+    if sess is not None:
+        try:
+            return sess.run(js, args, is_async=True, timeout=timeout + 5)
+        except CdpUnavailable as exc:
+            logger.debug(f"DevTools fast path failed: {exc}; using Selenium.")
+            drop_cdp_session(driver)
+    return driver.execute_async_script(js, *args)
 
 def safe_click(driver, elem):
     try:
@@ -309,6 +1164,14 @@ def safe_click(driver, elem):
     except Exception:
         driver.execute_script("arguments[0].click();", elem)
 
+def check_login(user: str | None, pwd: str | None) -> str | None:
+    # Returns why the login is refused, or None when it is allowed.
+    if not user or user not in ALLOWED_USERS:
+        return "Not authorised."
+    if pwd not in ALLOWED_PASSWORDS:
+        return "Incorrect password."
+    return None
+
 def gui_login() -> str:
     pins = load_pins()
     while True:
@@ -325,8 +1188,9 @@ def gui_login() -> str:
             messagebox.showerror("Login", "Not authorised.")
             continue
         pwd = simpledialog.askstring("Login", f"Password for {user}:", show="*")
-        if pwd not in ALLOWED_PASSWORDS:
-            messagebox.showerror("Login", "Incorrect password.")
+        refused = check_login(user, pwd)
+        if refused:
+            messagebox.showerror("Login", refused)
             continue
         if user not in pins and messagebox.askyesno("Quick-PIN", "Create quick-PIN for next time?"):
             p1 = simpledialog.askstring("Quick-PIN", "New PIN:", show="*")
@@ -367,31 +1231,261 @@ def customer_has_email(driver) -> bool:
     except Exception:
         return True
 
+CAROUSEL_NEXT_XPATH = "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]"
+
+# What "the current customer" means to both the snapshot and the readiness
+# waits: the page URL plus the displayed customer name.
+_CUSTOMER_IDENTITY_EXPR = r"""(location.href + '|' + ((() => {
+    const el = document.evaluate("//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]",
+        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return el ? (el.innerText || el.textContent || '').trim() : '';
+})()))"""
+
+# One round trip that answers every question the auto loops ask about the
+# current customer page. The XPaths mirror is_customer_claimed,
+# customer_has_email and the per-flow checks so both paths agree.
+TASK_EDIT_XPATH = "//li[@analyticsdetect='Timeline|PerformAction|TaskToDo' and contains(.,'Edit')]"
+
+_PAGE_STATE_JS = r"""
+const first = (xp) => document.evaluate(xp, document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const all = (xp) => {
+    const res = document.evaluate(xp, document, null,
+        XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const out = [];
+    for (let i = 0; i < res.snapshotLength; i++) out.push(res.snapshotItem(i));
+    return out;
+};
+const shown = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const claimed = !!(
+    first("//div[contains(@class,'act-button')]//div[contains(@class,'actionvalue') and contains(text(),'New Deal')]") ||
+    first("//drc-add-vehicle") || first("//drc-add-trade") ||
+    first("//div[@analyticsdetect='Sidebar|Open|NewDeal']"));
+const nameEl = first("//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]");
+// The customer's own id, when the header carries one (a data attribute or a
+// link to the customer record); keeps same-named customers on a shared URL apart.
+const custId = (() => {
+    const box = first("//div[contains(@class,'deal-customer')]");
+    if (!box) return "";
+    for (const el of [box, ...box.querySelectorAll("[data-customer-id],[data-customerid],[customerid],a[href]")]) {
+        const id = el.getAttribute("data-customer-id") || el.getAttribute("data-customerid") || el.getAttribute("customerid");
+        if (id) return id.trim();
+        const m = (el.getAttribute("href") || "").match(/customers?\/(\d+)/i);
+        if (m) return m[1];
+    }
+    return "";
+})();
+return {
+    claimed: claimed,
+    has_email: !first("//div[contains(@class,'cust-act-cnt-eml')]//div[contains(@class,'msg')]//h4[contains(text(),'no valid email specified')]"),
+    opted_out: !!first("//h4[contains(text(),'Status: Opted out')]"),
+    name: nameEl ? (nameEl.innerText || nameEl.textContent || "").trim() : "",
+    has_task_edit: all(%s).some(shown),
+    url: location.href,
+    key: location.origin + location.pathname + '|' + (nameEl ? (nameEl.innerText || nameEl.textContent || "").trim() : "")
+        + (custId ? '|#' + custId : ''),
+    identity: %s
+};
+""" % (json.dumps(TASK_EDIT_XPATH), _CUSTOMER_IDENTITY_EXPR)
+
+_CLICK_CAROUSEL_NEXT_JS = r"""
+const btn = document.evaluate(arguments[0], document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!btn) return null;
+const leaving = %s;
+btn.click();
+return leaving;
+""" % _CUSTOMER_IDENTITY_EXPR
+
+def first_name_from(full_name: str) -> str:
+    parts = full_name.strip().title().split()
+    return parts[0] if parts else ""
+
+def read_page_state(driver) -> dict:
+    state = page_script(driver, _PAGE_STATE_JS) or {}
+    state["first_name"] = first_name_from(state.get("name", ""))
+    return state
+
+# Lookup + click of the carousel arrow in one call. Returns the identity of the
+# customer being left, or None when there is no next customer.
+def click_carousel_next(driver) -> str | None:
+    return page_script(driver, _CLICK_CAROUSEL_NEXT_JS, CAROUSEL_NEXT_XPATH)
+
+# ---- Readiness waits ----
+# Instead of fixed sleeps, a MutationObserver re-tests a JS predicate on every
+# DOM change and resolves as soon as it holds (or the timeout passes). The
+# predicate is spliced into the script rather than eval'd so page CSP can't
+# block it; it can use xp(), shown() and `arg`.
+_WAIT_FOR_JS = r"""
+const done = arguments[arguments.length - 1];
+const timeoutMs = arguments[0];
+const arg = arguments[1];
+const xp = (x) => document.evaluate(x, document, null,
+    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const shown = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+const test = () => { try { return !!(__PREDICATE__); } catch (e) { return false; } };
+if (test()) { done(true); return; }
+let finished = false, obs = null, poll = null, timer = null;
+const finish = (ok) => {
+    if (finished) return;
+    finished = true;
+    if (obs) obs.disconnect();
+    clearInterval(poll);
+    clearTimeout(timer);
+    done(ok);
+};
+obs = new MutationObserver(() => { if (test()) finish(true); });
+obs.observe(document.documentElement,
+    {childList: true, subtree: true, attributes: true, characterData: true});
+// Route changes don't always touch the DOM straight away; a slow poll covers them.
+poll = setInterval(() => { if (test()) finish(true); }, 150);
+timer = setTimeout(() => finish(test()), timeoutMs);
+"""
+
+def wait_in_page(driver, predicate_js: str, timeout: float = 5.0, arg=None) -> bool:
+    script = _WAIT_FOR_JS.replace("__PREDICATE__", predicate_js)
+    try:
+        return bool(page_async_script(driver, script, timeout, int(timeout * 1000), arg))
+    except Exception as exc:
+        logger.debug(f"wait_in_page failed: {exc}")
+        return False
+
+def wait_for_customer_change(driver, prev_identity: str, timeout: float = 8.0) -> bool:
+    return wait_in_page(driver,
+        "%s !== arg && !!xp(\"//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]\")"
+        % _CUSTOMER_IDENTITY_EXPR, timeout, prev_identity)
+
+def wait_for_claim_modal_closed(driver, timeout: float = 8.0) -> bool:
+    return wait_in_page(driver,
+        "!shown(xp(\"//button[.//span[normalize-space(text())='Claim']]\"))", timeout)
+
+def wait_for_email_panel(driver, timeout: float = 5.0) -> bool:
+    # Ready once the subject box is enabled, or DriveCentric says there is no address.
+    return wait_in_page(driver,
+        "(() => { const s = xp(\"//input[@placeholder='Subject']\"); return s && !s.disabled; })() || "
+        "!!xp(\"//div[contains(@class,'cust-act-cnt-eml')]//div[contains(@class,'msg')]//h4[contains(text(),'no valid email specified')]\")",
+        timeout)
+
+def wait_for_text_panel(driver, timeout: float = 5.0) -> bool:
+    return wait_in_page(driver,
+        "(() => { const t = xp(\"//textarea[contains(@class,'emoji-input-action-text')]\"); return shown(t) && !t.disabled; })() || "
+        "!!xp(\"//h4[contains(text(),'Status: Opted out')]\") || "
+        "!!xp(\"//button[@analyticsdetect='CustomerActions|OptIn|Text']\")",
+        timeout)
+
+def wait_for_task_editor(driver, timeout: float = 5.0) -> bool:
+    return wait_in_page(driver,
+        "!!xp(\"//div[contains(@class,'action-list__button')]\") || "
+        "!!xp(\"//input[@placeholder='Select a date']\")", timeout)
+
+def wait_for_task_editor_closed(driver, timeout: float = 5.0) -> bool:
+    return wait_in_page(driver, "!shown(xp(\"//input[@placeholder='Select a date']\"))", timeout)
+
+def wait_for_gone(driver, xpath: str, timeout: float = 3.0) -> bool:
+    return wait_in_page(driver, "!shown(xp(arg))", timeout, xpath)
+
+@timed_stage("advance")
+def advance_to_next_customer(driver, timeout: float = 8.0) -> bool:
+    prev = click_carousel_next(driver)
+    if prev is None:
+        return False
+    if not wait_for_customer_change(driver, prev, timeout):
+        gui_print(f"Next customer did not load within {timeout:.0f}s; continuing.")
+    return True
+
+# ---- Element resolver ----
+# Each logical target lists its strategies: an XPath, a CSS selector, or a
+# visible-text match ("text" = contains, "text=" = exact, case-insensitive)
+# over the given tags. All of them run in one script inside the page, so a
+# text fallback no longer costs a .text round trip per element. The strategy
+# that hit is remembered and tried first for the next customer. Usable
+# (shown and enabled) matches are preferred; text matches resolve to the
+# innermost element, not the container around it.
+@dataclass(frozen=True)
+class Locator:
+    name: str
+    strategies: tuple[tuple[str, ...], ...]
+    # Ignore matches that are hidden or disabled.
+    usable_only: bool = False
+
+_LOCATE_FN = r"""((strategies, usableOnly) => {
+  const shown = (el) => !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+  const usable = (el) => shown(el) && !el.disabled;
+  const norm = (s) => (s || '').replace(/\s+/g, ' ').trim().toLowerCase();
+  for (let i = 0; i < strategies.length; i++) {
+    const [kind, expr, tags] = strategies[i];
+    let found = [];
+    if (kind === 'xpath') {
+      const r = document.evaluate(expr, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+      for (let j = 0; j < r.snapshotLength; j++) found.push(r.snapshotItem(j));
+    } else if (kind === 'css') {
+      found = Array.from(document.querySelectorAll(expr));
+    } else {
+      const want = norm(expr);
+      const hit = (el) => kind === 'text=' ? norm(el.textContent) === want : norm(el.textContent).includes(want);
+      const cands = Array.from(document.querySelectorAll(tags || 'button, a, div')).filter(hit);
+      found = cands.filter((el) => !cands.some((o) => o !== el && el.contains(o)));
+    }
+    const best = found.find(usable) || (usableOnly ? null : found[0]);
+    if (best) return [i, best];
+  }
+  return null;
+})"""
+
+_locator_wins: dict[str, int] = {}
+
+def find_target(driver, loc: Locator, timeout: float = 0.0):
+    win = _locator_wins.get(loc.name, 0)
+    order = [win] + [i for i in range(len(loc.strategies)) if i != win]
+    strategies = [list(loc.strategies[i]) for i in order]
+    if timeout:
+        wait_in_page(driver, f"!!{_LOCATE_FN}(arg[0], arg[1])", timeout, [strategies, loc.usable_only])
+    hit = driver.execute_script(f"return {_LOCATE_FN}(arguments[0], arguments[1]);",
+                                strategies, loc.usable_only)
+    if not hit:
+        return None
+    idx = order[hit[0]]
+    if idx != win:
+        logger.info(f"Locator {loc.name}: strategy {idx} ({loc.strategies[idx][0]}) now tried first.")
+        _locator_wins[loc.name] = idx
+    return hit[1]
+
+CLAIM_BUTTON = Locator("claim_button", (
+    ("xpath", "//*[contains(@analyticsdetect,'ClaimCustomer') and (self::button or self::div or self::a)]"),
+    ("text", "claim customer", "button, a, div"),
+))
+CLAIM_CONFIRM = Locator("claim_confirm", (
+    ("xpath", "//button[.//span[normalize-space(text())='Claim']]"),
+    ("text=", "claim", "button, a, div"),
+), usable_only=True)
+EMAIL_TAB = Locator("email_tab", (
+    ("xpath", "//li[contains(@analyticsdetect,'CustomerAction|Navigate|Email') and not(contains(@class,'active'))]"),
+    ("xpath", "//button[.//span[contains(text(),'Email')]] | //a[.//span[contains(text(),'Email')]]"),
+))
+TASK_SAVE = Locator("task_save", (
+    ("css", "button.drc-button.kind-filled.type-primary.size-medium.state-default"),
+    ("text=", "save", "button"),
+), usable_only=True)
+
+def open_email_tab(driver):
+    try:
+        tab = find_target(driver, EMAIL_TAB)
+        if tab is not None:
+            safe_click(driver, tab)
+            wait_for_email_panel(driver)
+    except Exception:
+        pass
+
+@timed_stage("claim")
 def click_claim_and_replace(driver):
     try:
-        claim_btn = None
-        claim_btns = driver.find_elements(
-            By.XPATH,
-            "//*[contains(@analyticsdetect,'ClaimCustomer') and (self::button or self::div or self::a)]"
-        )
-        claim_btns = [b for b in claim_btns if b.is_displayed()] or claim_btns
-        if claim_btns:
-            claim_btn = claim_btns[0]
-        else:
-            btns = driver.find_elements(By.XPATH, "//button | //a | //div")
-            for btn in btns:
-                if btn.text.strip().lower().find("claim customer") >= 0:
-                    claim_btn = btn
-                    break
+        claim_btn = find_target(driver, CLAIM_BUTTON)
         if not claim_btn:
-            html = driver.page_source
-            logger.error("Claim button not found! DriveCentric DOM dumped for debugging.")
-            gui_print("❌ Claim button not found. (See log for DOM html).")
-            with open(USER_DATA_DIR / "last_dom.html", "w", encoding="utf-8") as f:
-                f.write(html)
+            capture_failure(driver, "claim_button_missing")
+            logger.error("Claim button not found! Page snapshot saved for debugging.")
+            gui_print(f"❌ Claim button not found. (Page snapshot saved under {SNAPSHOT_DIR.name}).")
             return False
         driver.execute_script("arguments[0].scrollIntoView(true);", claim_btn)
-        time.sleep(0.2)
         safe_click(driver, claim_btn)
         gui_print("✅ 'Claim Customer' button clicked. Waiting for modal...")
         try:
@@ -416,51 +1510,135 @@ def click_claim_and_replace(driver):
         if not found and radio_inputs:
             safe_click(driver, radio_inputs[0])
             gui_print("Default salesperson selected.")
-        claim_btn_modal = None
-        try:
-            claim_btn_modal = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//button[.//span[normalize-space(text())='Claim']]")
-                )
-            )
-        except Exception:
-            btns = driver.find_elements(By.XPATH, "//button | //a | //div")
-            for b in btns:
-                if b.text.strip().lower() == "claim":
-                    claim_btn_modal = b
-                    break
+        claim_btn_modal = find_target(driver, CLAIM_CONFIRM, timeout=10)
         if claim_btn_modal is not None:
             safe_click(driver, claim_btn_modal)
             gui_print("🎯 Final 'Claim' confirmed.")
         else:
             gui_print("❌ Could not find final 'Claim' confirmation button.")
             return False
-        time.sleep(1)
+        if not wait_for_claim_modal_closed(driver):
+            gui_print("Claim dialog still open after confirming; continuing.")
         return True
     except Exception as exc:
         logger.error(f"Error in claim process: {exc}\n{traceback.format_exc()}")
         gui_print(f"Error in claim process: {exc}")
         return False
 
+# ---- Action scheduler ----
+# Every browser action (buttons and hot-keys) runs on one worker thread that
+# owns the attached tab, so two actions never click into the same page at once.
+# Waiting actions sit in a priority queue; pressing an action that is already
+# queued, or pressing it again within ACTION_DEBOUNCE, is a no-op. Auto modes
+# let waiting manual actions run between customers, and STOP drops queued ones.
+PRIORITY_MANUAL = 0
+PRIORITY_AUTO = 10
+ACTION_DEBOUNCE = 0.75
+
+class ActionScheduler:
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._queue: list[tuple[int, int, str, Callable, tuple, dict]] = []
+        self._seq = itertools.count()
+        self._last_press: dict[str, float] = {}
+        self._running: list[tuple[str, int]] = []
+        self._thread: threading.Thread | None = None
+
+    def submit(self, label: str, fn: Callable, args: tuple = (), kwargs: dict | None = None,
+               priority: int = PRIORITY_MANUAL) -> bool:
+        now = time.monotonic()
+        with self._cv:
+            if now - self._last_press.get(label, -ACTION_DEBOUNCE) < ACTION_DEBOUNCE:
+                return False
+            self._last_press[label] = now
+            queued = False
+            if any(item[2] == label for item in self._queue):
+                note = f"{label} is already queued."
+            elif priority >= PRIORITY_AUTO and any(name == label for name, _ in self._running):
+                note = f"{label} is already running."
+            else:
+                heapq.heappush(self._queue, (priority, next(self._seq), label, fn, args, kwargs or {}))
+                queued = True
+                note = f"{label} queued behind {self._running[-1][0]}." if self._running else None
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="actions", daemon=True)
+                    self._thread.start()
+                self._cv.notify()
+        if note:
+            gui_print(note)
+        return queued
+
+    def cancel(self, min_priority: int = PRIORITY_AUTO) -> int:
+        with self._cv:
+            keep = [item for item in self._queue if item[0] < min_priority]
+            dropped = len(self._queue) - len(keep)
+            heapq.heapify(keep)
+            self._queue = keep
+        return dropped
+
+    def yield_to_pending(self):
+        # Called by long-running actions at safe points: runs anything queued
+        # with a more urgent priority, inline on the worker thread.
+        if threading.current_thread() is not self._thread or not self._running:
+            return
+        current = self._running[-1][1]
+        while True:
+            with self._cv:
+                if not self._queue or self._queue[0][0] >= current:
+                    return
+                item = heapq.heappop(self._queue)
+            gui_print(f"Pausing {self._running[-1][0]} for {item[2]}.")
+            self._run(item)
+
+    def _run(self, item):
+        priority, _, label, fn, args, kwargs = item
+        self._running.append((label, priority))
+        try:
+            fn(*args, **kwargs)
+        except Exception as exc:
+            gui_print(f"{label} error: {exc}")
+            logger.debug(traceback.format_exc())
+        finally:
+            self._running.pop()
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while not self._queue:
+                    self._cv.wait()
+                item = heapq.heappop(self._queue)
+            self._run(item)
+
+action_scheduler = ActionScheduler()
+
+def scheduled(label: str, priority: int = PRIORITY_MANUAL):
+    # The undecorated function stays reachable as .__wrapped__ for synchronous
+    # callers such as the benchmark runner.
+    def deco(fn):
+        @functools.wraps(fn)
+        def submit(*a, **kw):
+            action_scheduler.submit(label, fn, a, kw, priority)
+        return submit
+    return deco
+
+@scheduled("Claim Only")
 def claim_only_customer():
     gui_print("\n--- Claim Only ---", status="Claim Only")
-    def _work():
-        drv = get_chrome_driver()
-        if drv:
-            try:
-                if not is_customer_claimed(drv):
-                    claimed = click_claim_and_replace(drv)
-                    if claimed:
-                        gui_print("Claimed customer.")
-                    else:
-                        gui_print("Claim not performed.")
+    drv = get_chrome_driver()
+    if drv:
+        try:
+            if not is_customer_claimed(drv):
+                claimed = click_claim_and_replace(drv)
+                if claimed:
+                    gui_print("Claimed customer.")
                 else:
-                    gui_print("Customer already claimed.")
-            except Exception as exc:
-                gui_print(f"Claim only error: {exc}")
-                logger.debug(traceback.format_exc())
-        status_var.set("Ready")
-    threading.Thread(target=_work, daemon=True).start()
+                    gui_print("Claim not performed.")
+            else:
+                gui_print("Customer already claimed.")
+        except Exception as exc:
+            gui_print(f"Claim only error: {exc}")
+            logger.debug(traceback.format_exc())
+    set_status("Ready")
 
 def clear_input_fast(elem):
     elem.click()
@@ -468,8 +1646,84 @@ def clear_input_fast(elem):
     elem.send_keys(Keys.BACKSPACE)
     elem.send_keys(Keys.CONTROL, "a")
     elem.send_keys(Keys.BACKSPACE)
-    time.sleep(0.1)
 
+# ---- Fast text entry ----
+# One script call sets the whole value instead of one synthetic key event per
+# character. The native value setter is used so Angular's value accessor sees
+# the change, then input/change fire. The value is read back and, if the page
+# rejected it, the field is typed the old way.
+_FILL_FIELD_JS = """
+const el = arguments[0], text = arguments[1];
+const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+el.focus();
+Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, text);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+el.dispatchEvent(new Event('blur'));
+return el.value;
+"""
+
+# Email body: TinyMCE's own API when the page exposes it, else the editor
+# iframe's body directly (same origin). Either way no frame switch is needed.
+# Returns the editor's plain text for the read-back, or null.
+_FILL_EMAIL_BODY_JS = """
+const text = arguments[0];
+const esc = s => s.replace(/[&<>"]/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+const html = text.split('\\n').map(l => '<p>' + (l.trim() ? esc(l) : '&nbsp;') + '</p>').join('');
+const frame = document.querySelector("iframe[id$='_ifr']");
+const mce = window.tinymce;
+const ed = mce && ((frame && mce.get && mce.get(frame.id.replace(/_ifr$/, ''))) || mce.activeEditor);
+if (ed && ed.setContent) {
+  ed.setContent(html);
+  if (ed.undoManager) ed.undoManager.add();
+  ed.fire('input'); ed.fire('change');
+  if (ed.save) ed.save();
+  return ed.getContent({format: 'text'});
+}
+const body = frame && frame.contentDocument && frame.contentDocument.body;
+if (!body || body.getAttribute('contenteditable') !== 'true') return null;
+body.innerHTML = html;
+body.dispatchEvent(new Event('input', {bubbles: true}));
+return body.innerText;
+"""
+
+def _same_text(a: str | None, b: str) -> bool:
+    return a is not None and " ".join(a.split()) == " ".join(b.split())
+
+def fill_field(driver, elem, text: str):
+    try:
+        if driver.execute_script(_FILL_FIELD_JS, elem, text) == text:
+            return
+        logger.debug("Fast fill read back a different value; typing instead.")
+    except Exception as exc:
+        logger.debug(f"Fast fill failed: {exc}; typing instead.")
+    elem.clear()
+    elem.send_keys(text)
+
+def fill_email_body(driver, body: str):
+    try:
+        if _same_text(page_script(driver, _FILL_EMAIL_BODY_JS, body), body):
+            return
+        logger.debug("Fast e-mail body rejected; typing instead.")
+    except Exception as exc:
+        logger.debug(f"Fast e-mail body failed: {exc}; typing instead.")
+    try:
+        iframe = driver.find_element(By.XPATH, "//iframe[contains(@id,'_ifr')]")
+        driver.switch_to.frame(iframe)
+    except Exception:
+        pass
+    try:
+        body_elem = WebDriverWait(driver, 5).until(
+            EC.presence_of_element_located((By.XPATH, "//body[@contenteditable='true']"))
+        )
+        body_elem.click()
+        body_elem.send_keys(Keys.CONTROL + "a")
+        body_elem.send_keys(Keys.BACKSPACE)
+        body_elem.send_keys(body)
+    finally:
+        driver.switch_to.default_content()
+
+@timed_stage("task")
 def edit_task_after_claim(driver):
     try:
         WebDriverWait(driver, 12).until(
@@ -486,7 +1740,7 @@ def edit_task_after_claim(driver):
             raise Exception("Edit button not found for task.")
         safe_click(driver, edit_btn)
         gui_print("Task 'Edit' opened.")
-        time.sleep(0.5)
+        wait_for_task_editor(driver)
         act_btns = driver.find_elements(By.XPATH,
             "//div[contains(@class,'action-list__button') and (.//span[contains(text(),'Phone')] or .//span[contains(text(),'Text')])]")
         if act_btns:
@@ -502,18 +1756,18 @@ def edit_task_after_claim(driver):
         clear_input_fast(date_input)
         date_input.send_keys(today)
         gui_print(f"Task date set to {today}.")
-        save_btns = driver.find_elements(By.CSS_SELECTOR,
-            "button.drc-button.kind-filled.type-primary.size-medium.state-default")
-        for btn in save_btns:
-            if btn.is_displayed() and btn.is_enabled():
-                safe_click(driver, btn)
-                break
+        save_btn = find_target(driver, TASK_SAVE)
+        if save_btn is not None:
+            safe_click(driver, save_btn)
         gui_print("Task saved.")
-        time.sleep(0.5)
+        wait_for_task_editor_closed(driver)
+        return True
     except Exception as exc:
         gui_print(f"Task edit error: {exc}")
         logger.debug(traceback.format_exc())
+        return False
 
+@timed_stage("task")
 def set_task_to_touchpoint(driver):
     try:
         WebDriverWait(driver, 12).until(
@@ -530,7 +1784,7 @@ def set_task_to_touchpoint(driver):
             raise Exception("Edit button not found for task.")
         safe_click(driver, edit_btn)
         gui_print("Task 'Edit' opened.")
-        time.sleep(0.5)
+        wait_for_task_editor(driver)
         act_btns = driver.find_elements(By.XPATH,
             "//div[contains(@class,'action-list__button') and (.//span[contains(text(),'Phone')] or .//span[contains(text(),'Text')])]")
         if act_btns:
@@ -548,14 +1802,11 @@ def set_task_to_touchpoint(driver):
         clear_input_fast(date_input)
         date_input.send_keys(today)
         gui_print(f"Task date set to {today}.")
-        save_btns = driver.find_elements(By.CSS_SELECTOR,
-            "button.drc-button.kind-filled.type-primary.size-medium.state-default")
-        for btn in save_btns:
-            if btn.is_displayed() and btn.is_enabled():
-                safe_click(driver, btn)
-                break
+        save_btn = find_target(driver, TASK_SAVE)
+        if save_btn is not None:
+            safe_click(driver, save_btn)
         gui_print("Task saved (set as Touchpoint).")
-        time.sleep(0.5)
+        wait_for_task_editor_closed(driver)
         return True
     except Exception as exc:
         gui_print(f"Touchpoint task error: {exc}")
@@ -576,38 +1827,23 @@ def ensure_claimed_only(driver):
         gui_print("Customer not claimed; claiming ...")
         click_claim_and_replace(driver)
 
-def send_email_message(driver):
-    try:
-        nav_email_tabs = driver.find_elements(By.XPATH, "//li[contains(@analyticsdetect,'CustomerAction|Navigate|Email') and not(contains(@class,'active'))]")
-        if nav_email_tabs:
-            safe_click(driver, nav_email_tabs[0])
-            time.sleep(0.5)
-        else:
-            email_btn_alts = driver.find_elements(By.XPATH, "//button[.//span[contains(text(),'Email')]] | //a[.//span[contains(text(),'Email')]]")
-            if email_btn_alts:
-                safe_click(driver, email_btn_alts[0])
-                time.sleep(0.5)
-    except Exception:
-        pass
+def send_email_message(driver, first_name: str | None = None):
+    open_email_tab(driver)
     if not customer_has_email(driver):
         gui_print("No customer email found, skipping email step for this customer.", status="Skipped email")
         return False
-    try:
-        first_name = driver.find_element(
-            By.XPATH,
-            "//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]"
-        ).text.strip().title().split()[0]
-    except Exception:
-        gui_print("Could not read customer name for e-mail.")
-        return False
-    subject = templates["email_subject"].format(
-        customer_name=first_name,
-        sender_name=sender_name
-    )
-    body = templates["email_body"].format(
-        customer_name=first_name,
-        sender_name=sender_name
-    )
+    if not first_name:
+        try:
+            first_name = driver.find_element(
+                By.XPATH,
+                "//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]"
+            ).text.strip().title().split()[0]
+        except Exception:
+            gui_print("Could not read customer name for e-mail.")
+            return False
+    tpl = get_templates()
+    subject = tpl.render("email_subject", first_name)
+    body = tpl.render("email_body", first_name)
     try:
         _compose_email(driver, subject, body)
         gui_print("📧 Standard e-mail sent.")
@@ -617,29 +1853,19 @@ def send_email_message(driver):
         logger.debug(traceback.format_exc())
         return False
 
-def send_custom_email_message(driver):
-    try:
-        nav_email_tabs = driver.find_elements(By.XPATH, "//li[contains(@analyticsdetect,'CustomerAction|Navigate|Email') and not(contains(@class,'active'))]")
-        if nav_email_tabs:
-            safe_click(driver, nav_email_tabs[0])
-            time.sleep(0.5)
-        else:
-            email_btn_alts = driver.find_elements(By.XPATH, "//button[.//span[contains(text(),'Email')]] | //a[.//span[contains(text(),'Email')]]")
-            if email_btn_alts:
-                safe_click(driver, email_btn_alts[0])
-                time.sleep(0.5)
-    except Exception:
-        pass
+def send_custom_email_message(driver, variant: str | None = None):
+    open_email_tab(driver)
     if not customer_has_email(driver):
         gui_print("No customer email found, skipping custom email step.", status="Skipped email")
         return False
-    variant = choose_custom_email_template()
+    variant = variant or choose_custom_email_template()
     if not variant:
         gui_print("Custom e-mail cancelled by user.")
         return False
     subj_key = f"custom_email_subject_{variant}"
     body_key = f"custom_email_body_{variant}"
-    if not templates.get(subj_key) or not templates.get(body_key):
+    tpl = get_templates()
+    if not tpl.get(subj_key) or not tpl.get(body_key):
         gui_print("Selected e-mail template is empty – edit templates first.")
         return False
     try:
@@ -650,14 +1876,8 @@ def send_custom_email_message(driver):
     except Exception:
         gui_print("Could not read customer name for e-mail.")
         return False
-    subject = templates[subj_key].format(
-        customer_name=first_name,
-        sender_name=sender_name
-    )
-    body = templates[body_key].format(
-        customer_name=first_name,
-        sender_name=sender_name
-    )
+    subject = tpl.render(subj_key, first_name)
+    body = tpl.render(body_key, first_name)
     try:
         _compose_email(driver, subject, body)
         gui_print(f"📧 Custom e-mail ({variant}) sent.")
@@ -667,19 +1887,9 @@ def send_custom_email_message(driver):
         logger.debug(traceback.format_exc())
         return False
 
+@timed_stage("email")
 def _compose_email(driver, subject: str, body: str):
-    try:
-        nav_email_tabs = driver.find_elements(By.XPATH, "//li[contains(@analyticsdetect,'CustomerAction|Navigate|Email') and not(contains(@class,'active'))]")
-        if nav_email_tabs:
-            safe_click(driver, nav_email_tabs[0])
-            time.sleep(0.3)
-        else:
-            email_btn_alts = driver.find_elements(By.XPATH, "//button[.//span[contains(text(),'Email')]] | //a[.//span[contains(text(),'Email')]]")
-            if email_btn_alts:
-                safe_click(driver, email_btn_alts[0])
-                time.sleep(0.3)
-    except Exception:
-        pass
+    open_email_tab(driver)
     try:
         WebDriverWait(driver, 5).until(
             EC.element_to_be_clickable((By.XPATH,
@@ -689,44 +1899,35 @@ def _compose_email(driver, subject: str, body: str):
         pass
     if not customer_has_email(driver):
         raise Exception("No valid email specified for this contact.")
-    time.sleep(0.3)
     subj_box = WebDriverWait(driver, 5).until(
         EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Subject']"))
     )
-    subj_box.clear()
-    subj_box.send_keys(subject)
-    try:
-        iframe = driver.find_element(By.XPATH, "//iframe[contains(@id,'_ifr')]")
-        driver.switch_to.frame(iframe)
-    except Exception:
-        pass
-    body_elem = WebDriverWait(driver, 5).until(
-        EC.presence_of_element_located((By.XPATH, "//body[@contenteditable='true']"))
-    )
-    body_elem.click()
-    body_elem.send_keys(Keys.CONTROL + "a")
-    body_elem.send_keys(Keys.BACKSPACE)
-    body_elem.send_keys(body)
-    driver.switch_to.default_content()
+    fill_field(driver, subj_box, subject)
+    fill_email_body(driver, body)
     send_btn = WebDriverWait(driver, 5).until(
         EC.element_to_be_clickable((By.XPATH,
             "//button[@analyticsdetect='ComposeEmail|Send|Email']"))
     )
+    ledger_send_attempt("email")
     safe_click(driver, send_btn)
 
-def send_custom_text_message(driver):
-    template_key = choose_custom_text_template()
+def send_custom_text_message(driver, template_key: str | None = None):
+    template_key = template_key or choose_custom_text_template()
     if not template_key:
         gui_print("Custom text cancelled by user.")
         return
-    if not templates.get(template_key):
+    if not get_templates().get(template_key):
         gui_print("Selected text template is empty – edit templates first.")
         return
+    _compose_custom_text(driver, template_key)
+
+@timed_stage("text")
+def _compose_custom_text(driver, template_key: str):
     WebDriverWait(driver, 7).until(
         EC.element_to_be_clickable((By.XPATH,
             "//li[@analyticsdetect='CustomerAction|Navigate|Text']"))
     ).click()
-    time.sleep(0.4)
+    wait_for_text_panel(driver)
     if driver.find_elements(By.XPATH, "//h4[contains(text(),'Status: Opted out')]"):
         gui_print("Customer is opted-out of texts.")
         return
@@ -738,7 +1939,7 @@ def send_custom_text_message(driver):
         if opt_in:
             safe_click(driver, opt_in)
             gui_print("Customer opted-in for texting.")
-            time.sleep(0.4)
+            wait_for_gone(driver, "//button[@analyticsdetect='CustomerActions|OptIn|Text']")
     except Exception:
         pass
     send_btn = WebDriverWait(driver, 4).until(
@@ -757,24 +1958,20 @@ def send_custom_text_message(driver):
             By.XPATH, "//textarea[contains(@class,'emoji-input-action-text')]"))
     )
     if not textarea.get_attribute("value").strip():
-        textarea.send_keys(
-            templates[template_key].format(
-                customer_name=first_name,
-                sender_name=sender_name
-            )
-        )
+        fill_field(driver, textarea, render_template(template_key, first_name))
     safe_click(driver, send_btn)
     gui_print(f"📲 Custom text ({template_key[-1]}) sent.")
 
-def send_text_message(driver):
+@timed_stage("text")
+def send_text_message(driver, first_name: str | None = None):
     WebDriverWait(driver, 7).until(
         EC.element_to_be_clickable((By.XPATH,
             "//li[@analyticsdetect='CustomerAction|Navigate|Text']"))
     ).click()
-    time.sleep(0.4)
+    wait_for_text_panel(driver)
     if driver.find_elements(By.XPATH, "//h4[contains(text(),'Status: Opted out')]"):
         gui_print("Customer is opted-out of texts.")
-        return
+        return False
     try:
         opt_in = WebDriverWait(driver, 2).until(
             EC.presence_of_element_located((
@@ -783,33 +1980,31 @@ def send_text_message(driver):
         if opt_in:
             safe_click(driver, opt_in)
             gui_print("Customer opted-in for texting.")
-            time.sleep(0.4)
+            wait_for_gone(driver, "//button[@analyticsdetect='CustomerActions|OptIn|Text']")
     except Exception:
         pass
     send_btn = WebDriverWait(driver, 4).until(
         EC.presence_of_element_located((
             By.XPATH, "//button[@analyticsdetect='CustomerActions|Send|Text']"))
     )
-    try:
-        first_name = driver.find_element(
-            By.XPATH,
-            "//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]"
-        ).text.strip().title().split()[0]
-    except Exception:
-        first_name = ""
+    if first_name is None:
+        try:
+            first_name = driver.find_element(
+                By.XPATH,
+                "//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]"
+            ).text.strip().title().split()[0]
+        except Exception:
+            first_name = ""
     textarea = WebDriverWait(driver, 5).until(
         EC.visibility_of_element_located((
             By.XPATH, "//textarea[contains(@class,'emoji-input-action-text')]"))
     )
     if not textarea.get_attribute("value").strip():
-        textarea.send_keys(
-            templates["standard_text"].format(
-                customer_name=first_name,
-                sender_name=sender_name
-            )
-        )
+        fill_field(driver, textarea, render_template("standard_text", first_name))
+    ledger_send_attempt("text")
     safe_click(driver, send_btn)
     gui_print("📲 Standard text sent.")
+    return True
 
 def choose_radio_dialog(title: str, prompt: str, options: list[tuple[str, str]]) -> str | None:
     top = tk.Toplevel(root)
@@ -847,11 +2042,7 @@ def choose_custom_email_template() -> str | None:
                               "Select the custom E-MAIL template to send:",
                               opts)
 
-def threaded(fn):
-    return lambda *a, **kw: threading.Thread(target=fn, args=a, kwargs=kw,
-        daemon=True).start()
-
-@threaded
+@scheduled("Claim+Edit")
 def claim_customer():
     gui_print("\n--- Claim + Edit Task ---", status="Claim+Edit")
     drv = get_chrome_driver()
@@ -861,9 +2052,9 @@ def claim_customer():
         except Exception as exc:
             gui_print(f"Claim+Edit error: {exc}")
             logger.debug(traceback.format_exc())
-        status_var.set("Ready")
+        set_status("Ready")
 
-@threaded
+@scheduled("Std Text")
 def send_text_wrapper():
     gui_print("\n--- Send Standard Text ---", status="Send Text")
     drv = get_chrome_driver()
@@ -874,22 +2065,22 @@ def send_text_wrapper():
         except Exception as exc:
             gui_print(f"Text flow error: {exc}")
             logger.debug(traceback.format_exc())
-        status_var.set("Ready")
+        set_status("Ready")
 
-@threaded
-def send_custom_text_wrapper():
+@scheduled("Custom Text")
+def send_custom_text_wrapper(template_key: str | None = None):
     gui_print("\n--- Send Custom Text ---", status="Custom Text")
     drv = get_chrome_driver()
     if drv:
         try:
             ensure_claimed_only(drv)
-            send_custom_text_message(drv)
+            send_custom_text_message(drv, template_key)
         except Exception as exc:
             gui_print(f"Custom text flow error: {exc}")
             logger.debug(traceback.format_exc())
-        status_var.set("Ready")
+        set_status("Ready")
 
-@threaded
+@scheduled("Std Email")
 def send_email_wrapper():
     gui_print("\n--- Send Standard Email ---", status="Send Email")
     drv = get_chrome_driver()
@@ -902,24 +2093,24 @@ def send_email_wrapper():
         except Exception as exc:
             gui_print(f"Email flow error: {exc}")
             logger.debug(traceback.format_exc())
-        status_var.set("Ready")
+        set_status("Ready")
 
-@threaded
-def send_custom_email_wrapper():
+@scheduled("Custom Email")
+def send_custom_email_wrapper(variant: str | None = None):
     gui_print("\n--- Send Custom Email ---", status="Custom Email")
     drv = get_chrome_driver()
     if drv:
         try:
             ensure_claimed_only(drv)
-            res = send_custom_email_message(drv)
+            res = send_custom_email_message(drv, variant)
             if res is False:
                 gui_print("No email found. Custom email step skipped.", status="No Email")
         except Exception as exc:
             gui_print(f"Custom e-mail flow error: {exc}")
             logger.debug(traceback.format_exc())
-        status_var.set("Ready")
+        set_status("Ready")
 
-@threaded
+@scheduled("Full Outreach")
 def full_outreach_wrapper():
     gui_print("\n--- Full Outreach (Claim + Email + Text) ---", status="Full Outreach")
     drv = get_chrome_driver()
@@ -934,304 +2125,1179 @@ def full_outreach_wrapper():
         except Exception as exc:
             gui_print(f"Outreach error: {exc}")
             logger.debug(traceback.format_exc())
-        status_var.set("Ready")
-
-# ---- AUTO Touchpoint+Email+Text+Next mode: will process all customers until carousel ends or stopped ----
-@threaded
-def auto_touchpoint_email_text_next():
-    gui_print("Auto Touchpoint+Email+Text+Next started (STOP/ctrl+alt+Q to halt).", status="Auto Touchpoint+Email+Text+Next")
-    drv = get_chrome_driver()
-    if not drv:
-        status_var.set("Ready")
+        set_status("Ready")
+
+# ---- Processed-customer ledger ----
+# Every claim / task edit / e-mail / text outcome is written to a local SQLite
+# file as it happens, keyed by the customer's page key. Auto modes check it so a
+# restart (or an outer-loop retry) never repeats a step done within the
+# ledger_skip_hours window; they simply skip ahead to the next customer.
+# E-mails and texts get an "attempted" row just before Send is clicked, and an
+# attempted or failed send counts as done: it may have gone out, and a crash
+# between the click and the outcome row must not lead to a second send.
+LEDGER_DONE_OUTCOMES = ("ok", "skipped")
+LEDGER_SEND_ACTIONS = ("email", "text")
+LEDGER_SEND_DONE_OUTCOMES = LEDGER_DONE_OUTCOMES + ("attempted", "failed")
+
+class CustomerLedger:
+    def __init__(self, path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " id INTEGER PRIMARY KEY,"
+                " customer TEXT NOT NULL,"
+                " name TEXT,"
+                " action TEXT NOT NULL,"
+                " outcome TEXT NOT NULL,"
+                " mode TEXT,"
+                " ts REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS events_customer ON events (customer, action, ts)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS events_action ON events (action, ts)")
+
+    def record(self, customer: str, action: str, outcome: str, name: str = "", mode: str = ""):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO events (customer, name, action, outcome, mode, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (customer, name, action, outcome, mode, time.time()))
+
+    def done_since(self, customer: str, action: str, since_ts: float,
+                   outcomes: tuple[str, ...] = LEDGER_DONE_OUTCOMES) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM events WHERE customer = ? AND action = ? AND ts >= ?"
+                " AND outcome IN (%s) LIMIT 1" % ", ".join("?" * len(outcomes)),
+                (customer, action, since_ts, *outcomes)).fetchone()
+        return row is not None
+
+    def ok_times_since(self, action: str, since_ts: float) -> list[float]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts FROM events WHERE action = ? AND ts >= ? AND outcome = 'ok' ORDER BY ts",
+                (action, since_ts)).fetchall()
+        return [r[0] for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_ledger: CustomerLedger | None = None
+_ledger_lock = threading.Lock()
+
+def get_ledger() -> CustomerLedger | None:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            try:
+                _ledger = CustomerLedger(LEDGER_FILE)
+            except Exception as exc:
+                logger.error(f"Ledger unavailable: {exc}")
+                return None
+        return _ledger
+
+# Name of the auto mode the current thread is running, for the ledger rows.
+_mode_ctx = threading.local()
+# Page state of the customer the current thread's auto run is processing, so
+# the send helpers can record an attempt before clicking Send.
+_ledger_ctx = threading.local()
+
+def ledger_record(state: dict, action: str, outcome: str):
+    led = get_ledger()
+    if led is None or not state.get("key"):
         return
-    auto_stop_event.clear()
-    while not auto_stop_event.is_set():
-        try:
-            # Ensure claimed for each customer
-            if not is_customer_claimed(drv):
-                gui_print("Customer not claimed; claiming ...")
-                if not click_claim_and_replace(drv):
-                    gui_print("Could not claim. Skipping this customer.", status="Claim failed")
-                    # Move to next and continue loop!
-                    next_btns = drv.find_elements(By.XPATH, "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-                    if next_btns:
-                        safe_click(drv, next_btns[0])
-                        gui_print("➡️ Moved to next customer after claim fail.", status="Next customer")
-                        time.sleep(1.0)
-                        continue
-                    else:
-                        gui_print("No more customers in carousel/list. Stopping.", status="No more customers")
-                        break
-            else:
-                gui_print("Customer already claimed.")
+    try:
+        led.record(state["key"], action, outcome, state.get("name", ""), getattr(_mode_ctx, "mode", ""))
+    except Exception as exc:
+        logger.warning(f"Ledger write failed: {exc}")
 
-            # Edit task to Touchpoint (same as F8 logic)
-            ok = set_task_to_touchpoint(drv)
-            if not ok:
-                gui_print("Could not set task to Touchpoint (see log).")
+def ledger_send_attempt(action: str):
+    state = getattr(_ledger_ctx, "state", None)
+    if state is not None:
+        ledger_record(state, action, "attempted")
 
-            # Send e-mail if available
-            sent_email = False
-            if customer_has_email(drv):
-                try:
-                    sent_email = send_email_message(drv)
-                    if sent_email:
-                        gui_print("Standard e-mail sent.")
-                except Exception as ex:
-                    gui_print(f"Email error: {ex}")
+def ledger_done(state: dict, action: str) -> bool:
+    hours = float(settings["ledger_skip_hours"])
+    led = get_ledger()
+    if hours <= 0 or led is None or not state.get("key"):
+        return False
+    outcomes = LEDGER_SEND_DONE_OUTCOMES if action in LEDGER_SEND_ACTIONS else LEDGER_DONE_OUTCOMES
+    try:
+        return led.done_since(state["key"], action, time.time() - hours * 3600, outcomes)
+    except Exception as exc:
+        logger.warning(f"Ledger read failed: {exc}")
+        return False
+
+def already_handled(state: dict, actions: tuple[str, ...]) -> bool:
+    return all(ledger_done(state, a) for a in actions)
+
+# ---- Send-rate governor ----
+# Auto modes pace themselves between customers instead of running flat out and
+# sleeping a fixed time after an error. The pause before a customer's first
+# stage doubles when a customer hits an error that pushes the share of the
+# last GOVERNOR_WINDOW customers with errors past max_error_rate, or when a
+# stage takes GOVERNOR_SLOW_FACTOR times its usual time GOVERNOR_SLOW_REPEAT
+# times in a row. Every clean customer shrinks it by GOVERNOR_RECOVER, so a
+# burst of errors costs minutes, not the rest of the run.
+# Customers that run no stage (not accepted, already in the ledger) count as
+# clean but are neither paced nor move the pause. Hourly caps are counted from
+# the ledger, so they hold across restarts and are shared by parallel tabs.
+GOVERNOR_WINDOW = 20
+GOVERNOR_RECOVER = 0.75
+GOVERNOR_MIN_BACKOFF = 1.0
+GOVERNOR_MAX_GAP = 60.0
+GOVERNOR_SLOW_FACTOR = 2.0
+GOVERNOR_SLOW_FLOOR = 0.5
+GOVERNOR_SLOW_REPEAT = 2
+
+class SendGovernor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.gap = float(settings["min_gap"])
+            self.backoffs = 0
+            # One entry per customer: did it hit an error?
+            self._recent: collections.deque[bool] = collections.deque(maxlen=GOVERNOR_WINDOW)
+            self._usual: dict[str, float] = {}
+            self._slow_runs: dict[str, int] = {}
+            self._slow: str | None = None
+        # Per worker thread: what the customer in progress has done so far.
+        self._current = threading.local()
+
+    def observe(self, stage: str, outcome: str, seconds: float):
+        cur = self._current
+        cur.ran = True
+        cur.failed = getattr(cur, "failed", False) or outcome == "failed"
+        if outcome != "ok":
+            return
+        with self._lock:
+            usual = self._usual.get(stage)
+            if usual is None:
+                self._usual[stage] = seconds
+                return
+            if seconds > max(usual * GOVERNOR_SLOW_FACTOR, GOVERNOR_SLOW_FLOOR):
+                runs = self._slow_runs.get(stage, 0) + 1
+                if runs >= GOVERNOR_SLOW_REPEAT:
+                    self._slow = f"{stage} slow {runs}x in a row, last {seconds:.1f}s (usually {usual:.1f}s)"
+                    runs = 0
+                self._slow_runs[stage] = runs
             else:
-                gui_print("No email for this customer.")
+                self._slow_runs[stage] = 0
+            # Clamped so one stall doesn't become the new normal.
+            self._usual[stage] = usual + 0.1 * (min(seconds, usual * GOVERNOR_SLOW_FACTOR) - usual)
+
+    def customer_done(self, error: str | None = None):
+        cur = self._current
+        failed = bool(error) or getattr(cur, "failed", False)
+        ran = failed or getattr(cur, "ran", False)
+        cur.ran = cur.failed = False
+        with self._lock:
+            self._recent.append(failed)
+            if not ran:
+                return
+            rate = sum(self._recent) / GOVERNOR_WINDOW
+            reason = self._slow
+            if failed and rate > float(settings["max_error_rate"]):
+                reason = f"{error or 'stage failed'}; error rate {rate:.0%}"
+            self._slow = None
+            floor = float(settings["min_gap"])
+            if reason:
+                self.gap = min(GOVERNOR_MAX_GAP, max(self.gap * 2, floor + GOVERNOR_MIN_BACKOFF))
+                self.backoffs += 1
+            elif not failed:
+                gap = self.gap * GOVERNOR_RECOVER
+                self.gap = gap if gap >= floor + GOVERNOR_MIN_BACKOFF else floor
+            gap = self.gap
+        if reason:
+            gui_print(f"Slowing down ({reason}); next customer in {gap:.1f}s.")
+
+    def cap_wait(self, actions: tuple[str, ...]) -> tuple[float, str]:
+        led = get_ledger()
+        caps = settings["hourly_caps"]
+        if led is None:
+            return 0.0, ""
+        now = time.time()
+        wait, which = 0.0, ""
+        for action in actions:
+            cap = int(caps.get(action) or 0)
+            if cap <= 0:
+                continue
+            try:
+                times = led.ok_times_since(action, now - 3600)
+            except Exception as exc:
+                logger.warning(f"Ledger read failed: {exc}")
+                continue
+            if len(times) >= cap and times[-cap] + 3600 - now > wait:
+                wait, which = times[-cap] + 3600 - now, f"{action} cap of {cap}/hour"
+        return wait, which
+
+    def wait_turn(self, mode: AutoMode) -> bool:
+        # Returns False when the run was stopped while waiting.
+        wait, which = self.cap_wait(tuple(s.name for s in mode.stages))
+        if which:
+            resume = datetime.datetime.now() + datetime.timedelta(seconds=wait)
+            gui_print(f"Hourly {which} reached; resuming at {resume:%H:%M}.", status="Hourly cap reached")
+        deadline = time.monotonic() + max(wait, self.gap)
+        while (left := deadline - time.monotonic()) > 0:
+            if auto_stop_event.wait(min(left, 1.0)):
+                return False
+            action_scheduler.yield_to_pending()
+        return not auto_stop_event.is_set()
+
+send_governor = SendGovernor()
+
+# ---- Failure snapshots ----
+# A failing step grabs the page HTML (plus a screenshot when enabled) in one
+# call; hashing, gzip and disk writes happen on a background thread. Files are
+# named by content hash, so an identical page is stored once however often it
+# fails, and index.sqlite3 keeps the newest SNAPSHOT_KEEP entries per kind.
+SNAPSHOT_KEEP = 25
+_SNAPSHOT_JS = "return [location.href, document.documentElement.outerHTML];"
+
+class SnapshotStore:
+    def __init__(self, folder: Path, keep: int = SNAPSHOT_KEEP):
+        self.folder = folder
+        self.keep = keep
+        self._queue: queue.Queue = queue.Queue(maxsize=16)
+        threading.Thread(target=self._loop, name="snapshots", daemon=True).start()
+
+    def submit(self, kind: str, html: str, png: bytes | None, context: dict) -> bool:
+        try:
+            self._queue.put_nowait((kind, time.time(), html, png, context))
+            return True
+        except queue.Full:
+            logger.warning(f"Snapshot queue full; {kind} snapshot dropped.")
+            return False
 
-            # Send text if possible
+    def _loop(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.folder / "index.sqlite3"))
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " kind TEXT NOT NULL,"
+                " dom TEXT NOT NULL,"
+                " screenshot TEXT,"
+                " first_ts REAL NOT NULL,"
+                " last_ts REAL NOT NULL,"
+                " hits INTEGER NOT NULL,"
+                " context TEXT,"
+                " PRIMARY KEY (kind, dom))")
+            conn.execute("CREATE INDEX IF NOT EXISTS snapshots_recent ON snapshots (kind, last_ts)")
+        while True:
+            item = self._queue.get()
             try:
-                send_text_message(drv)
-            except Exception as ex:
-                gui_print(f"Text send error: {ex}")
-
-            # Advance to next customer (carousel)
-            next_btns = drv.find_elements(By.XPATH, "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-            if next_btns:
-                safe_click(drv, next_btns[0])
-                gui_print("➡️ Moved to next customer via carousel.", status="Next customer")
-                time.sleep(1.0)
-            else:
-                gui_print("No more customers in carousel/list. Stopping.", status="No more customers")
+                self._store(conn, *item)
+            except Exception as exc:
+                logger.warning(f"Snapshot not saved: {exc}")
+
+    def _write_blob(self, data: bytes, suffix: str, compress: bool) -> str:
+        path = self.folder / f"{hashlib.sha256(data).hexdigest()[:24]}{suffix}"
+        if not path.exists():
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(gzip.compress(data, 6) if compress else data)
+            tmp.replace(path)
+        return path.name
+
+    def _store(self, conn, kind: str, ts: float, html: str, png: bytes | None, context: dict):
+        dom = self._write_blob(html.encode("utf-8"), ".html.gz", True)
+        shot = self._write_blob(png, ".png", False) if png else None
+        with conn:
+            conn.execute(
+                "INSERT INTO snapshots (kind, dom, screenshot, first_ts, last_ts, hits, context)"
+                " VALUES (?, ?, ?, ?, ?, 1, ?)"
+                " ON CONFLICT (kind, dom) DO UPDATE SET last_ts = excluded.last_ts, hits = hits + 1,"
+                " screenshot = COALESCE(excluded.screenshot, screenshot), context = excluded.context",
+                (kind, dom, shot, ts, ts, json.dumps(context, ensure_ascii=False)))
+            conn.execute(
+                "DELETE FROM snapshots WHERE kind = ? AND rowid NOT IN"
+                " (SELECT rowid FROM snapshots WHERE kind = ? ORDER BY last_ts DESC LIMIT ?)",
+                (kind, kind, self.keep))
+            live = {r[0] for r in conn.execute(
+                "SELECT dom FROM snapshots UNION SELECT screenshot FROM snapshots WHERE screenshot IS NOT NULL")}
+        for f in itertools.chain(self.folder.glob("*.html.gz"), self.folder.glob("*.png")):
+            if f.name not in live:
+                f.unlink(missing_ok=True)
+
+_snapshots: SnapshotStore | None = None
+_snapshots_lock = threading.Lock()
+
+def get_snapshot_store() -> SnapshotStore:
+    global _snapshots
+    with _snapshots_lock:
+        if _snapshots is None:
+            _snapshots = SnapshotStore(SNAPSHOT_DIR)
+        return _snapshots
+
+def capture_failure(driver, kind: str, **context):
+    try:
+        url, html = page_script(driver, _SNAPSHOT_JS)
+        png = driver.get_screenshot_as_png() if settings["snapshot_screenshots"] else None
+    except Exception as exc:
+        logger.debug(f"Snapshot capture failed: {exc}")
+        return
+    get_snapshot_store().submit(kind, html, png, {"url": url, **context})
+
+# ---- Auto-mode pipeline engine ----
+# Every auto mode is the same loop: probe the customer page once, run an
+# ordered list of stages against that snapshot, then advance the carousel.
+# A mode is just a declaration of which stages it runs and which customers it
+# accepts. Stage outcomes ("ok" / "failed" / "skipped", and "optin" for a text
+# stage that only opted the customer in) go to the ledger and the send-rate
+# governor, which paces the loop between customers.
+#
+# A failed or erroring step is retried in place, up to its step_attempts, with
+# STEP_RETRY_BACKOFF doubling between tries. Finished steps are checkpointed
+# per customer for the run, so when an error escapes to the outer loop the
+# customer is resumed at its first unfinished step rather than from the claim;
+# after customer_attempts such errors it is skipped.
+STEP_RETRY_BACKOFF = 1.0
+
+_checkpoints: dict[str, dict[str, str]] = {}
+_checkpoints_lock = threading.Lock()
+
+def reset_checkpoints():
+    with _checkpoints_lock:
+        _checkpoints.clear()
+
+@dataclass
+class StageContext:
+    state: dict
+    outcomes: dict[str, str] = field(default_factory=dict)
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    label: str
+    run: Callable[..., str]
+    # Returns a reason when this customer permanently doesn't need the stage
+    # (no address, opted out...); the skip is recorded in the ledger.
+    skip: Callable[[StageContext], str | None] | None = None
+    # Earlier stages that must not have failed for this one to run.
+    requires: tuple[str, ...] = ()
+    # A failure here abandons the rest of the customer.
+    required: bool = False
+    # Consult the ledger before running (claim is always re-read from the page).
+    resumable: bool = True
+    # Template keys the stage renders; checked before a run starts.
+    templates: tuple[str, ...] = ()
+
+@dataclass(frozen=True)
+class AutoMode:
+    key: str
+    title: str
+    stages: tuple[Stage, ...]
+    # Returns a reason to pass over the customer without running any stage.
+    accept: Callable[[dict], str | None] | None = None
+
+def _run_claim(drv, ctx: StageContext) -> str:
+    if ctx.state["claimed"]:
+        gui_print("Customer already claimed.")
+        return "skipped"
+    gui_print("Customer not claimed; claiming ...")
+    return "ok" if click_claim_and_replace(drv) else "failed"
+
+TASK_EDIT_SETTLE = 2.0
+
+def _no_task_to_edit(drv, ctx: StageContext) -> str | None:
+    # A customer claimed in this run gets its task after the probe, so it always
+    # runs the task step. For the rest the probe's has_task_edit decides, with a
+    # short wait in case the timeline was still rendering, instead of the task
+    # helpers' 12 s wait for a task that isn't there.
+    if ctx.state.get("has_task_edit") or ctx.outcomes.get("claim") == "ok":
+        return None
+    if wait_in_page(drv, "shown(xp(arg))", TASK_EDIT_SETTLE, TASK_EDIT_XPATH):
+        return None
+    return "No open task to edit; skipping the task step."
+
+def _run_task_edit(drv, ctx: StageContext) -> str:
+    reason = _no_task_to_edit(drv, ctx)
+    if reason:
+        gui_print(reason)
+        return "skipped"
+    return "ok" if edit_task_after_claim(drv) else "failed"
+
+def _run_task_touchpoint(drv, ctx: StageContext) -> str:
+    reason = _no_task_to_edit(drv, ctx)
+    if reason:
+        gui_print(reason)
+        return "skipped"
+    if set_task_to_touchpoint(drv):
+        return "ok"
+    gui_print("Could not set task to Touchpoint (see log).")
+    return "failed"
+
+def _run_email(drv, ctx: StageContext) -> str:
+    if send_email_message(drv, first_name=ctx.state["first_name"]):
+        gui_print("Email sent for this customer.")
+        return "ok"
+    return "failed"
+
+def _run_text(drv, ctx: StageContext) -> str:
+    return "ok" if send_text_message(drv, first_name=ctx.state["first_name"]) else "skipped"
+
+_OPTIN_OR_RESEND_XPATH = ("//button[@analyticsdetect='CustomerActions|OptIn|Text'] | "
+                          "//button[contains(.,'RESEND')] | //button[contains(.,'Resend')]")
+
+# Text-only mode: an opt-in / RESEND click is this customer's step for the run.
+# It is recorded as "optin", not "ok", so the ledger doesn't treat the text as
+# sent (later runs still text them) and it doesn't count against the text cap.
+def _run_text_only(drv, ctx: StageContext) -> str:
+    WebDriverWait(drv, 7).until(
+        EC.element_to_be_clickable((By.XPATH,
+            "//li[@analyticsdetect='CustomerAction|Navigate|Text']"))
+    ).click()
+    wait_for_text_panel(drv)
+    # The opt-out banner only renders inside the Text tab, so re-probe once it is open.
+    if read_page_state(drv)["opted_out"]:
+        gui_print("Auto: Customer is opted-out of texts. Skipping this customer.")
+        return "skipped"
+    try:
+        for btn in drv.find_elements(By.XPATH, _OPTIN_OR_RESEND_XPATH):
+            if btn.is_displayed() and btn.is_enabled():
+                safe_click(drv, btn)
+                gui_print("Auto: Opt-in or RESEND clicked for texting.")
+                wait_for_gone(drv, _OPTIN_OR_RESEND_XPATH, 2.0)
+                return "optin"
+    except Exception:
+        pass
+    with stage_timer("text"):
+        send_btn = WebDriverWait(drv, 2.5).until(
+            EC.presence_of_element_located((
+                By.XPATH, "//button[@analyticsdetect='CustomerActions|Send|Text']"))
+        )
+        textarea = WebDriverWait(drv, 3).until(
+            EC.visibility_of_element_located((
+                By.XPATH, "//textarea[contains(@class,'emoji-input-action-text')]"))
+        )
+        if not textarea.get_attribute("value").strip():
+            fill_field(drv, textarea, render_template("standard_text", ctx.state["first_name"]))
+        ledger_send_attempt("text")
+        safe_click(drv, send_btn)
+    gui_print("Auto: 📲 Standard text sent.")
+    return "ok"
+
+def _no_email(ctx: StageContext) -> str | None:
+    return None if ctx.state["has_email"] else "No email found for customer. Skipping email."
+
+STAGE_CLAIM = Stage("claim", "Claim", _run_claim, resumable=False)
+STAGE_CLAIM_REQUIRED = Stage("claim", "Claim", _run_claim, resumable=False, required=True)
+STAGE_TASK_EDIT = Stage("task", "Task edit", _run_task_edit, requires=("claim",))
+STAGE_TASK_TOUCHPOINT = Stage("task", "Touchpoint task", _run_task_touchpoint)
+STAGE_EMAIL = Stage("email", "Email", _run_email, skip=_no_email,
+                    templates=("email_subject", "email_body"))
+STAGE_TEXT = Stage("text", "Text", _run_text, templates=("standard_text",))
+STAGE_TEXT_ONLY = Stage("text", "Text", _run_text_only, templates=("standard_text",))
+
+AUTO_MODES: dict[str, AutoMode] = {m.key: m for m in (
+    AutoMode("auto_process", "Auto-process",
+             (STAGE_CLAIM, STAGE_TASK_EDIT, STAGE_EMAIL, STAGE_TEXT)),
+    AutoMode("touchpoint_email_text", "Auto Touchpoint+Email+Text+Next",
+             (STAGE_CLAIM_REQUIRED, STAGE_TASK_TOUCHPOINT, STAGE_EMAIL, STAGE_TEXT)),
+    AutoMode("text_only", "Auto-text-only", (STAGE_CLAIM, STAGE_TEXT_ONLY)),
+    AutoMode("email_only", "Auto-email-only", (STAGE_CLAIM, STAGE_EMAIL)),
+    AutoMode("claimed_outreach", "Auto Claimed-Only Outreach", (STAGE_EMAIL, STAGE_TEXT),
+             accept=lambda st: None if st["claimed"]
+                 else "Not claimed, skipping (this auto mode only processes claimed)."),
+)}
+
+def process_customer(drv, mode: AutoMode, state: dict | None = None) -> StageContext:
+    ctx = StageContext(state if state is not None else read_page_state(drv))
+    if ctx.state.get("key"):
+        with _checkpoints_lock:
+            ctx.outcomes = _checkpoints.setdefault(ctx.state["key"], {})
+    _trace_ctx.customer = ctx.state.get("key")
+    _ledger_ctx.state = ctx.state
+    try:
+        return _run_stages(drv, mode, ctx)
+    finally:
+        _trace_ctx.customer = None
+        _ledger_ctx.state = None
+
+def _run_stages(drv, mode: AutoMode, ctx: StageContext) -> StageContext:
+    who = ctx.state["first_name"] or "Customer"
+    reason = mode.accept(ctx.state) if mode.accept else None
+    if reason:
+        gui_print(reason)
+        return ctx
+    if already_handled(ctx.state, tuple(s.name for s in mode.stages if s.resumable)):
+        gui_print(f"{who} already handled (ledger); skipping.")
+        return ctx
+    paced = False
+    for stage in mode.stages:
+        if auto_stop_event.is_set():
+            break
+        if stage.name in ctx.outcomes:
+            if ctx.outcomes[stage.name] == "failed" and stage.required:
                 break
+            continue
+        if any(ctx.outcomes.get(r) == "failed" for r in stage.requires):
+            continue
+        if stage.resumable and ledger_done(ctx.state, stage.name):
+            gui_print(f"{stage.label} already done for {who} (ledger).")
+            continue
+        reason = stage.skip(ctx) if stage.skip else None
+        if reason:
+            gui_print(reason)
+            outcome = _finish_stage(mode, ctx, stage, "skipped", 0.0)
+        else:
+            # Paced only once the customer actually has work to do.
+            if not paced:
+                if not send_governor.wait_turn(mode):
+                    break
+                paced = True
+            outcome = _run_stage_attempts(drv, mode, ctx, stage)
+        if outcome is None:
+            break
+        if outcome == "failed" and stage.required:
+            gui_print(f"{stage.label} failed. Skipping this customer.", status=f"{stage.label} failed")
+            break
+    return ctx
+
+def _finish_stage(mode: AutoMode, ctx: StageContext, stage: Stage, outcome: str, duration: float) -> str:
+    ctx.outcomes[stage.name] = outcome
+    ledger_record(ctx.state, stage.name, outcome)
+    log_event(customer=ctx.state.get("key"), name=ctx.state.get("name"), mode=mode.key,
+              stage=stage.name, outcome=outcome, duration=round(duration, 3))
+    return outcome
+
+def _run_stage_attempts(drv, mode: AutoMode, ctx: StageContext, stage: Stage) -> str | None:
+    # Returns None when the page moved to another customer during a retry.
+    attempts = max(1, int(settings["step_attempts"].get(stage.name, 1)))
+    started = time.perf_counter()
+    for attempt in range(1, attempts + 1):
+        t0 = time.perf_counter()
+        error = None
+        try:
+            outcome = stage.run(drv, ctx)
         except Exception as exc:
-            gui_print(f"Auto Touchpoint+Email+Text+Next error: {exc}")
+            error, outcome = exc, "failed"
             logger.debug(traceback.format_exc())
-            time.sleep(2)
-    gui_print("Auto Touchpoint+Email+Text+Next stopped.")
-    status_var.set("Ready")
+        # Most stage helpers log and return False rather than raise, so snapshot
+        # every failure, not just exceptions.
+        if outcome == "failed":
+            capture_failure(drv, f"{stage.name}_{'error' if error else 'failed'}",
+                            customer=ctx.state.get("key"), mode=mode.key,
+                            error=str(error) if error else "stage reported failure", attempt=attempt)
+        send_governor.observe(stage.name, outcome, time.perf_counter() - t0)
+        detail = f" error: {error}" if error else " failed"
+        if outcome != "failed" or attempt == attempts or auto_stop_event.is_set():
+            if error:
+                gui_print(f"{stage.label}{detail}")
+            break
+        delay = STEP_RETRY_BACKOFF * 2 ** (attempt - 1)
+        gui_print(f"{stage.label}{detail}; retrying in {delay:.0f}s ({attempt}/{attempts}).")
+        if auto_stop_event.wait(delay):
+            break
+        try:
+            fresh = read_page_state(drv)
+        except Exception:
+            continue
+        if fresh.get("identity") != ctx.state.get("identity"):
+            gui_print(f"Page moved to another customer; abandoning {stage.label.lower()} retry.")
+            return None
+        ctx.state.update(fresh)
+    return _finish_stage(mode, ctx, stage, outcome, time.perf_counter() - started)
+
+# ---- Carousel pre-scan and run planning ----
+# With settings["prescan"] on, an auto run first builds an index of the
+# customers ahead. Where the page links to the other customers' pages, one
+# in-page read collects them (URL and name only; the header details are read
+# when the run reaches each one). Otherwise the carousel is walked once,
+# reading each customer's header (claimed, e-mail, opt-out when visible). The
+# run is then planned from the index: customers the mode won't accept, or that
+# the ledger says are done, are left out, and the run walks the carousel
+# processing only the rest, with total and remaining counts. Parallel tabs
+# share the plan and open their customers by URL, which needs each customer to
+# have its own URL; when they don't, the walking scan stops and the run walks
+# the carousel as usual.
+CAROUSEL_PREV_XPATH = "//*[@analyticsdetect='Carousel|Navigate|Left']"
+
+# Links to sibling customer pages: same route as the current one, last path
+# segment (the customer) different.
+_CUSTOMER_LINKS_JS = r"""
+const here = location.pathname.replace(/\/+$/, '');
+const route = here.slice(0, here.lastIndexOf('/') + 1);
+const nameOf = (el) => (el.innerText || el.textContent || '').trim().split('\n')[0].trim();
+const seen = new Set(), out = [];
+const add = (href, name) => {
+    const u = new URL(href, location.href);
+    const path = u.pathname.replace(/\/+$/, '');
+    if (!route || u.origin !== location.origin || !path.startsWith(route)
+            || path.slice(route.length).includes('/') || seen.has(path)) return;
+    seen.add(path);
+    out.push({url: u.href, name: name, key: u.origin + u.pathname + '|' + name});
+};
+const cur = document.evaluate("//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]",
+    document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+add(location.href, cur ? nameOf(cur) : '');
+for (const a of document.querySelectorAll('a[href]')) {
+    const name = nameOf(a);
+    if (name) add(a.getAttribute('href'), name);
+}
+return out;
+"""
 
-@threaded
-def auto_process_customers():
-    gui_print("Auto-process started (Ctrl+Alt+Q or STOP button to stop).", status="Auto-process")
+@dataclass
+class CarouselIndex:
+    start_url: str
+    entries: list[dict] = field(default_factory=list)
+    # True when the index was built by walking, so the tab is no longer on
+    # the first customer.
+    walked: bool = False
+
+    def plan(self, mode: AutoMode) -> list[dict]:
+        resumable = tuple(s.name for s in mode.stages if s.resumable)
+        # Entries from the link read have no header details yet; the mode's
+        # accept check runs on them when the run reaches them.
+        return [st for st in self.entries
+                if not (mode.accept and "claimed" in st and mode.accept(st))
+                and not already_handled(st, resumable)]
+
+# Entries from the link read can't know the customer id the page key may end
+# with, so plans are matched on the URL and name part alone.
+def plan_key(state: dict) -> str:
+    return state["key"].split("|#", 1)[0]
+
+@timed_stage("scan")
+def _scan_step(driver) -> dict:
+    return read_page_state(driver)
+
+def read_customer_links(driver, limit: int) -> CarouselIndex | None:
+    try:
+        links = page_script(driver, _CUSTOMER_LINKS_JS) or []
+    except Exception as exc:
+        logger.debug(f"Customer link read failed: {exc}")
+        return None
+    if len(links) < 2:
+        return None
+    entries = [dict(link, identity=link["url"] + "|" + link["name"],
+                    first_name=first_name_from(link["name"])) for link in links[:limit]]
+    return CarouselIndex(entries[0]["url"], entries)
+
+def prescan_carousel(driver, limit: int | None = None) -> CarouselIndex | None:
+    limit = int(limit or settings["prescan_limit"])
+    index = read_customer_links(driver, limit)
+    if index is not None:
+        gui_print(f"Pre-scan: {len(index.entries)} customers listed on the page.")
+        return index
+    first = _scan_step(driver)
+    index = CarouselIndex(first["url"], [first], walked=True)
+    seen = {first["identity"]}
+    gui_print("Pre-scanning carousel ...", status="Pre-scan")
+    while len(index.entries) < limit and not auto_stop_event.is_set():
+        if not advance_to_next_customer(driver):
+            break
+        state = _scan_step(driver)
+        if state["identity"] in seen:
+            break
+        if len(index.entries) == 1 and state["url"] == first["url"]:
+            gui_print("Customers share one URL; pre-scan not possible here, walking the carousel instead.")
+            try:
+                driver.find_element(By.XPATH, CAROUSEL_PREV_XPATH).click()
+                wait_for_customer_change(driver, state["identity"])
+            except Exception:
+                pass
+            return None
+        seen.add(state["identity"])
+        index.entries.append(state)
+        set_status(f"Pre-scan: {len(index.entries)} customers")
+    return index
+
+@timed_stage("jump")
+def jump_to_customer(driver, entry: dict, timeout: float = 10.0) -> bool:
+    if read_page_state(driver)["identity"] == entry["identity"]:
+        return True
+    driver.get(entry["url"])
+    return wait_in_page(driver, "%s === arg" % _CUSTOMER_IDENTITY_EXPR, timeout, entry["identity"])
+
+# ---- Tab memory watchdog ----
+# Over a long auto run the DriveCentric tab's JS heap and DOM keep growing
+# until the carousel crawls and Chrome kills the tab. Between customers the run
+# loops sample Performance.getMetrics every memory_check_every customers and
+# log the heap trend next to throughput (log file and events.jsonl). Past a
+# limit the page is reloaded at that safe point; if the reload doesn't bring
+# it back under, the tab is swapped for a fresh one. Either way the run is put
+# back on the customer it was about to process.
+def read_tab_metrics(driver) -> dict[str, float]:
+    sess = cdp_session(driver)
+    if sess is not None:
+        try:
+            sess.call("Performance.enable", {})
+            res = sess.call("Performance.getMetrics", {})
+            return {m["name"]: m["value"] for m in res["metrics"]}
+        except CdpUnavailable:
+            drop_cdp_session(driver)
+    driver.execute_cdp_cmd("Performance.enable", {})
+    res = driver.execute_cdp_cmd("Performance.getMetrics", {})
+    return {m["name"]: m["value"] for m in res["metrics"]}
+
+class TabWatchdog:
+    def __init__(self, driver):
+        self.driver = driver
+        self.started = time.monotonic()
+        self.customers = 0
+        self.reloads = self.recycles = 0
+        self.first_heap: float | None = None
+        self.last_heap: float | None = None
+        # (customers, heap MB) since the tab was last reset, for the trend.
+        self._samples: list[tuple[int, float]] = []
+
+    def sample(self) -> dict[str, float]:
+        m = read_tab_metrics(self.driver)
+        heap = m.get("JSHeapUsedSize", 0.0) / 1e6
+        if self.first_heap is None:
+            self.first_heap = heap
+        self.last_heap = heap
+        self._samples.append((self.customers, heap))
+        return {"heap_mb": heap, "nodes": m.get("Nodes", 0.0), "listeners": m.get("JSEventListeners", 0.0)}
+
+    def trend(self) -> float:
+        # Least-squares heap growth in MB per 100 customers.
+        pts = self._samples
+        if len(pts) < 2:
+            return 0.0
+        mx = sum(c for c, _ in pts) / len(pts)
+        my = sum(h for _, h in pts) / len(pts)
+        var = sum((c - mx) ** 2 for c, _ in pts)
+        return 100 * sum((c - mx) * (h - my) for c, h in pts) / var if var else 0.0
+
+    def over_limits(self, st: dict[str, float]) -> list[str]:
+        limits = (("JS heap", st["heap_mb"], float(settings["max_js_heap_mb"]), "MB"),
+                  ("DOM nodes", st["nodes"], float(settings["max_dom_nodes"]), ""),
+                  ("listeners", st["listeners"], float(settings["max_js_listeners"]), ""))
+        return [f"{name} {val:,.0f}{unit} > {lim:,.0f}{unit}" for name, val, lim, unit in limits if lim and val > lim]
+
+    def between_customers(self):
+        # Call with the next customer on screen and not yet processed.
+        self.customers += 1
+        every = int(settings["memory_check_every"])
+        if every <= 0 or self.customers % every:
+            return
+        try:
+            st = self.sample()
+            minutes = max((time.monotonic() - self.started) / 60, 1e-9)
+            rate = self.customers / minutes
+            logger.info(f"Tab memory after {self.customers} customers: heap {st['heap_mb']:.0f} MB "
+                        f"({self.trend():+.1f} MB/100 customers), {st['nodes']:,.0f} nodes, "
+                        f"{st['listeners']:,.0f} listeners; {rate:.1f} customers/min")
+            log_event(stage="tab_memory", customers=self.customers, heap_mb=round(st["heap_mb"], 1),
+                      nodes=int(st["nodes"]), listeners=int(st["listeners"]),
+                      heap_trend=round(self.trend(), 2), customers_per_min=round(rate, 2))
+            over = self.over_limits(st)
+            if over:
+                self.reset_tab(over)
+        except Exception as exc:
+            logger.info(f"Tab memory check failed: {exc}")
+
+    def reset_tab(self, over: list[str]):
+        target = read_page_state(self.driver)
+        gui_print(f"Tab over its memory limits ({'; '.join(over)}); reloading.", status="Reloading tab")
+        self.driver.refresh()
+        self.reloads += 1
+        self._restore(target)
+        self._samples.clear()
+        still = self.over_limits(self.sample())
+        if not still:
+            return
+        gui_print(f"Still over after reload ({'; '.join(still)}); opening a fresh tab.", status="Recycling tab")
+        self._recycle(target)
+        self.recycles += 1
+        self._restore(target)
+        self._samples.clear()
+        self.sample()
+
+    def _recycle(self, target: dict):
+        global _session_handle
+        drv = self.driver
+        old = drv.current_window_handle
+        drop_cdp_session(drv)
+        drv.switch_to.new_window("tab")
+        new = drv.current_window_handle
+        drv.get(target["url"])
+        drv.switch_to.window(old)
+        drv.close()
+        drv.switch_to.window(new)
+        with _session_lock:
+            if drv is _session_driver:
+                _session_handle = new
+
+    def _restore(self, target: dict):
+        if wait_in_page(self.driver, "%s === arg" % _CUSTOMER_IDENTITY_EXPR, 20, target["identity"]):
+            return
+        # Customers sharing one URL: the reload went back to the first customer.
+        for _ in range(int(settings["prescan_limit"])):
+            if not advance_to_next_customer(self.driver):
+                break
+            if read_page_state(self.driver)["identity"] == target["identity"]:
+                return
+        gui_print("Could not get back to the same customer after the reset; continuing from here.")
+
+    def report(self):
+        if self.first_heap is None:
+            return
+        gui_print(f"Tab memory: heap {self.first_heap:.0f} -> {self.last_heap:.0f} MB over "
+                  f"{self.customers} customers, {self.reloads} reload(s), {self.recycles} new tab(s).")
+
+def run_planned(drv, mode: AutoMode, index: CarouselIndex, watch: TabWatchdog,
+                max_customers: int | None = None):
+    plan = index.plan(mode)[:max_customers]
+    gui_print(f"{len(index.entries)} customers scanned, {len(plan)} need {mode.title}.", status=mode.title)
+    if not plan:
+        return
+    # A walking scan leaves the tab on the last customer; one reload puts it
+    # back on the first, and the run then walks the carousel from there.
+    if index.walked and not jump_to_customer(drv, index.entries[0]):
+        gui_print("Could not get back to the first scanned customer; walking on from here.")
+    run_walking(drv, mode, watch, max_customers, plan)
+
+def missing_templates(mode: AutoMode) -> list[str]:
+    tpl = get_templates(force_check=True)
+    return [k for stage in mode.stages for k in stage.templates if not tpl.get(k).strip()]
+
+def run_auto_mode(key: str, max_customers: int | None = None):
+    mode = AUTO_MODES[key]
+    missing = missing_templates(mode)
+    if missing:
+        gui_print(f"{mode.title} not started: template(s) {', '.join(missing)} are empty.",
+                  status="Template missing")
+        return
+    gui_print(f"{mode.title} started (Ctrl+Alt+Q or STOP button to stop).", status=mode.title)
+    # Started before attaching so the run's "attach" time is in its stats.
+    begin_stats_run(key)
     drv = get_chrome_driver()
     if not drv:
-        status_var.set("Ready")
+        set_status("Ready")
         return
+    _mode_ctx.mode = key
+    send_governor.reset()
+    reset_checkpoints()
     auto_stop_event.clear()
+    watch = TabWatchdog(drv)
+    index = prescan_carousel(drv) if settings["prescan"] else None
+    if index is not None:
+        run_planned(drv, mode, index, watch, max_customers)
+    else:
+        run_walking(drv, mode, watch, max_customers)
+    watch.report()
+    gui_print(f"{mode.title} stopped.")
+    log_stage_summary()
+    set_status("Ready")
+
+def run_walking(drv, mode: AutoMode, watch: TabWatchdog, max_customers: int | None = None,
+                plan: list[dict] | None = None):
+    # With a plan (from the pre-scan), customers not in it are stepped over
+    # without being processed and the run ends once every planned one is done.
+    pending = None if plan is None else {plan_key(e) for e in plan}
+    done = errors = 0
+    # Whether the customer on screen has been counted towards max_customers, so
+    # one that only succeeds on a retry still counts, and only once.
+    counted = False
     while not auto_stop_event.is_set():
         try:
-            claimed = is_customer_claimed(drv)
-            if not claimed:
-                try:
-                    claimed_now = click_claim_and_replace(drv)
-                    if claimed_now:
-                        edit_task_after_claim(drv)
-                except Exception as exc:
-                    gui_print(f"Claiming error: {exc}")
-            else:
-                try:
-                    edit_task_after_claim(drv)
-                except Exception as exc:
-                    gui_print(f"Task edit error: {exc}")
-            email_sent = False
-            email_available = customer_has_email(drv)
-            if email_available:
-                try:
-                    email_sent = send_email_message(drv)
-                    if email_sent:
-                        gui_print("Email sent for this customer.")
-                except Exception as exc:
-                    gui_print(f"Email error: {exc}")
-                    email_sent = False
-            else:
-                gui_print("No email found for customer. Skipping email.")
-            try:
-                send_text_message(drv)
-            except Exception as exc:
-                gui_print(f"Text error: {exc}")
-            next_btns = drv.find_elements(By.XPATH, "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-            if next_btns:
-                safe_click(drv, next_btns[0])
-                gui_print("➡️ Moved to next customer via carousel.")
-                time.sleep(1.2)
+            action_scheduler.yield_to_pending()
+            state = None if pending is None else read_page_state(drv)
+            if pending is None or counted or plan_key(state) in pending:
+                process_customer(drv, mode, state)
+                send_governor.customer_done()
+                if not counted:
+                    done += 1
+                    counted = True
+                if pending is not None:
+                    pending.discard(plan_key(state))
+                    set_status(f"{mode.title}: {done} done, {len(pending)} remaining")
+                    if not pending:
+                        gui_print("All planned customers done.")
+                        break
+            if auto_stop_event.is_set():
+                break
+            if max_customers and done >= max_customers:
+                gui_print(f"Customer limit ({max_customers}) reached.")
+                break
+            if advance_to_next_customer(drv):
+                errors, counted = 0, False
+                gui_print("➡️ Moved to next customer via carousel.", status=mode.title)
+                watch.between_customers()
             else:
-                gui_print("No more customers in carousel/list. Halting auto-process.", status="Auto-process stopped")
+                gui_print(f"No more customers in carousel/list. Halting {mode.title}.",
+                          status=f"{mode.title} stopped")
                 break
         except Exception as exc:
-            gui_print(f"Auto-process error (outer loop): {exc}")
+            gui_print(f"{mode.title} error: {exc}")
             logger.debug(traceback.format_exc())
-            time.sleep(2)
-    gui_print("Auto-process stopped.")
-    status_var.set("Ready")
+            send_governor.customer_done(type(exc).__name__)
+            errors += 1
+            if errors < int(settings["customer_attempts"]):
+                continue
+            gui_print(f"Giving up on this customer after {errors} errors.")
+            try:
+                moved = advance_to_next_customer(drv)
+            except Exception:
+                moved = False
+            if not moved:
+                gui_print(f"Could not move past the customer. Halting {mode.title}.",
+                          status=f"{mode.title} stopped")
+                break
+            errors, counted = 0, False
+
+@scheduled(AUTO_MODES["touchpoint_email_text"].title, PRIORITY_AUTO)
+def auto_touchpoint_email_text_next():
+    run_auto_mode("touchpoint_email_text")
 
-@threaded
+@scheduled(AUTO_MODES["auto_process"].title, PRIORITY_AUTO)
+def auto_process_customers():
+    run_auto_mode("auto_process")
+
+@scheduled(AUTO_MODES["text_only"].title, PRIORITY_AUTO)
 def auto_text_only_customers():
-    gui_print("Auto-text-only started (Ctrl+Alt+Q or STOP button to stop).", status="Auto-text")
-    drv = get_chrome_driver()
-    if not drv:
-        status_var.set("Ready")
-        return
-    auto_stop_event.clear()
-    while not auto_stop_event.is_set():
+    run_auto_mode("text_only")
+
+@scheduled(AUTO_MODES["email_only"].title, PRIORITY_AUTO)
+def auto_email_only_customers():
+    run_auto_mode("email_only")
+
+@scheduled(AUTO_MODES["claimed_outreach"].title, PRIORITY_AUTO)
+def auto_outreach_claimed_only():
+    run_auto_mode("claimed_outreach")
+
+# ---- Parallel auto-process: N DriveCentric tabs, one worker thread + WebDriver each ----
+class CustomerWorkQueue:
+    # Shared by the tab workers so no two of them claim or contact the same
+    # customer. With settings["prescan"] on it holds the planned customers and
+    # each tab pops the next one and opens it by URL, so work is split between
+    # the tabs. Otherwise each tab walks its own carousel and takes whichever
+    # customer it lands on that no other tab has taken yet; every tab still
+    # visits every customer, so throughput grows less than linearly with tabs.
+    def __init__(self, entries: list[dict] | None = None):
+        self._lock = threading.Lock()
+        self._taken: set[str] = set()
+        self._pending = collections.deque(entries or ())
+        self.planned = entries is not None
+        self.processed = 0
+
+    def next_entry(self) -> dict | None:
+        with self._lock:
+            return self._pending.popleft() if self._pending else None
+
+    def try_take(self, identity: str) -> bool:
+        with self._lock:
+            if identity in self._taken:
+                return False
+            self._taken.add(identity)
+            return True
+
+    def finish(self):
+        with self._lock:
+            self.processed += 1
+
+def _free_drivecentric_tab(drv, taken: set[str]) -> str | None:
+    for handle in drv.window_handles:
+        if handle in taken:
+            continue
         try:
-            if not is_customer_claimed(drv):
-                gui_print("Auto: Not claimed, claiming first.")
-                click_claim_and_replace(drv)
+            drv.switch_to.window(handle)
+            if (_is_drivecentric_url(drv.current_url)
+                    and drv.execute_script("return document.visibilityState") == "visible"):
+                return handle
+        except Exception:
+            continue
+    return None
+
+def _prepare_worker_tabs(count: int) -> list[tuple]:
+    # Returns [(driver, handle, opened_by_us)]. Workers are dealt round-robin
+    # across the live Chrome instances, starting with the one manual actions
+    # use (the current tab always goes to worker 1). Each reuses a free
+    # DriveCentric tab in its Chrome if it is the visible tab of its window, or
+    # opens the current customer's URL in a new window: Chrome throttles the
+    # timers and animation frames of background tabs, which would slow every
+    # worker but the front one to a crawl.
+    main = get_chrome_driver()
+    if not main:
+        return []
+    with _session_lock:
+        base_url = main.current_url
+        main_port = _driver_ports.get(main, CHROME_BASE_PORT)
+        taken = {main_port: {_session_handle}}
+    ports = [main_port] + [p for p in chrome_fleet.live_ports() if p != main_port]
+    if len(ports) > 1:
+        gui_print(f"Spreading {count} tabs over {len(ports)} Chrome instances.")
+    tabs = []
+    for i in range(count):
+        port = ports[i % len(ports)]
+        drv = _attach_new_driver(port=port)
+        if drv is None:
+            continue
+        try:
+            handle = _session_handle if i == 0 else _free_drivecentric_tab(drv, taken.setdefault(port, set()))
+            if handle is not None:
+                drv.switch_to.window(handle)
+                taken[port].add(handle)
+                tabs.append((drv, handle, False))
             else:
-                gui_print("Auto: Already claimed.")
-            WebDriverWait(drv, 7).until(
-                EC.element_to_be_clickable((By.XPATH,
-                    "//li[@analyticsdetect='CustomerAction|Navigate|Text']"))
-            ).click()
-            time.sleep(0.3)
-            if drv.find_elements(By.XPATH, "//h4[contains(text(),'Status: Opted out')]"):
-                gui_print("Auto: Customer is opted-out of texts. Skipping this customer.")
-                next_btns = drv.find_elements(By.XPATH,
-                    "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-                if next_btns:
-                    safe_click(drv, next_btns[0])
-                    gui_print("Auto: ➡️ Moved to next customer via carousel.")
-                    time.sleep(1.0)
-                else:
-                    gui_print("No more customers in carousel/list. Halting auto-text-only.", status="Auto-text-only stopped")
-                    break
-                continue
-            opt_in_sent = False
+                drv.switch_to.new_window("window")
+                drv.get(base_url)
+                if not wait_in_page(drv, "!!xp(\"//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]\")", 20):
+                    gui_print(f"Tab {i + 1}: customer page did not load in time (is this Chrome logged in?).")
+                taken[port].add(drv.current_window_handle)
+                tabs.append((drv, drv.current_window_handle, True))
+        except Exception as exc:
+            gui_print(f"Could not prepare tab {i + 1}: {exc}")
             try:
-                optin_btns = drv.find_elements(By.XPATH, "//button[@analyticsdetect='CustomerActions|OptIn|Text'] | //button[contains(.,'RESEND')] | //button[contains(.,'Resend')]")
-                for btn in optin_btns:
-                    if btn.is_displayed() and btn.is_enabled():
-                        safe_click(drv, btn)
-                        gui_print("Auto: Opt-in or RESEND clicked for texting.")
-                        opt_in_sent = True
-                        time.sleep(0.5)
-                        break
+                drv.quit()
             except Exception:
                 pass
-            if opt_in_sent:
-                next_btns = drv.find_elements(By.XPATH, "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-                if next_btns:
-                    safe_click(drv, next_btns[0])
-                    gui_print("Auto: ➡️ Moved to next customer via carousel.")
-                    time.sleep(1.0)
-                else:
-                    gui_print("No more customers in carousel/list. Halting auto-text-only.", status="Auto-text-only stopped")
-                    break
-                continue
-            send_btn = WebDriverWait(drv, 2.5).until(
-                EC.presence_of_element_located((
-                    By.XPATH, "//button[@analyticsdetect='CustomerActions|Send|Text']"))
-            )
+    return tabs
+
+def _parallel_planned(drv, mode: AutoMode, work: CustomerWorkQueue, watch: TabWatchdog):
+    attempts = max(1, int(settings["customer_attempts"]))
+    first = True
+    while not auto_stop_event.is_set():
+        entry = work.next_entry()
+        if entry is None:
+            gui_print("No more planned customers. Tab finished.")
+            return
+        if not first:
+            watch.between_customers()
+        first = False
+        who = entry["first_name"] or "customer"
+        for _ in range(attempts):
+            if auto_stop_event.is_set():
+                return
             try:
-                first_name = drv.find_element(
-                    By.XPATH,
-                    "//div[contains(@class,'deal-customer')]//span[contains(@class,'cust-name')]"
-                ).text.strip().title().split()[0]
-            except Exception:
-                first_name = ""
-            textarea = WebDriverWait(drv, 3).until(
-                EC.visibility_of_element_located((
-                    By.XPATH, "//textarea[contains(@class,'emoji-input-action-text')]"))
-            )
-            if not textarea.get_attribute("value").strip():
-                textarea.send_keys(
-                    templates["standard_text"].format(
-                        customer_name=first_name,
-                        sender_name=sender_name
-                    )
-                )
-            safe_click(drv, send_btn)
-            gui_print("Auto: 📲 Standard text sent.")
-            next_btns = drv.find_elements(By.XPATH,
-                "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-            if next_btns:
-                safe_click(drv, next_btns[0])
-                gui_print("Auto: ➡️ Moved to next customer via carousel.")
-                time.sleep(1.0)
-            else:
-                gui_print("No more customers in carousel/list. Halting auto-text-only.", status="Auto-text-only stopped")
+                if not jump_to_customer(drv, entry):
+                    gui_print(f"Could not open {who}; skipping.")
+                    send_governor.customer_done("customer page did not open")
+                    break
+                process_customer(drv, mode)
+                send_governor.customer_done()
+                work.finish()
                 break
-        except Exception as exc:
-            gui_print(f"Auto-text-only error: {exc}")
-            time.sleep(1)
-    gui_print("Auto-text-only stopped.")
-    status_var.set("Ready")
-
-@threaded
-def auto_email_only_customers():
-    gui_print("Auto-email-only started (Ctrl+Alt+Q or STOP button to stop).", status="Auto-email")
-    drv = get_chrome_driver()
-    if not drv:
-        status_var.set("Ready")
+            except Exception as exc:
+                gui_print(f"Parallel worker error: {exc}")
+                logger.debug(traceback.format_exc())
+                if _session_state(drv) == "dead":
+                    gui_print("This tab's Chrome has gone away; tab stopped.")
+                    return
+                send_governor.customer_done(type(exc).__name__)
+        else:
+            gui_print(f"Giving up on {who} after {attempts} errors.")
+
+def _parallel_worker(index: int, drv, work: CustomerWorkQueue):
+    _log_ctx.prefix = f"[Tab {index + 1}] "
+    _mode_ctx.mode = "auto_process_parallel"
+    if work.planned:
+        watch = TabWatchdog(drv)
+        _parallel_planned(drv, AUTO_MODES["auto_process"], work, watch)
+        watch.report()
         return
-    auto_stop_event.clear()
+    # Stagger the starting points so the tabs don't all race for the same customer.
+    for _ in range(index):
+        if auto_stop_event.is_set() or not advance_to_next_customer(drv):
+            return
+    mode = AUTO_MODES["auto_process"]
+    # The customer this tab took but has not finished, so a retry after an
+    # error resumes it instead of finding it "taken".
+    held, errors = None, 0
+    watch = TabWatchdog(drv)
     while not auto_stop_event.is_set():
         try:
-            if not is_customer_claimed(drv):
-                gui_print("Auto: Not claimed, claiming first.")
-                click_claim_and_replace(drv)
+            state = read_page_state(drv)
+            if state["key"] == held or work.try_take(state["key"]):
+                held = state["key"]
+                process_customer(drv, mode, state)
+                send_governor.customer_done()
+                work.finish()
+                held = None
             else:
-                gui_print("Auto: Already claimed.")
-            if not customer_has_email(drv):
-                gui_print("Auto: No email found for customer. Skipping to next.", status="No Email")
-            else:
-                send_email_message(drv)
-            next_btns = drv.find_elements(By.XPATH,
-                "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-            if next_btns:
-                safe_click(drv, next_btns[0])
-                gui_print("Auto: ➡️ Moved to next customer via carousel.")
-                time.sleep(1.0)
-            else:
-                gui_print("No more customers in carousel/list. Halting auto-email-only.", status="Auto-email-only stopped")
+                gui_print("Customer already taken by another tab; skipping.")
+            if not advance_to_next_customer(drv):
+                gui_print("No more customers in carousel/list. Tab finished.")
                 break
+            errors = 0
+            watch.between_customers()
         except Exception as exc:
-            gui_print(f"Auto-email-only error: {exc}")
-            time.sleep(1)
-    gui_print("Auto-email-only stopped.")
-    status_var.set("Ready")
-
-@threaded
-def auto_outreach_claimed_only():
-    gui_print("Auto Claimed-Only Outreach started (STOP to halt).", status="Auto-Claimed-Outreach")
-    drv = get_chrome_driver()
-    if not drv:
-        status_var.set("Ready")
-        return
-    auto_stop_event.clear()
-    while not auto_stop_event.is_set():
-        try:
-            if not is_customer_claimed(drv):
-                gui_print("Not claimed, skipping (this auto mode only processes claimed).")
-                next_btns = drv.find_elements(By.XPATH, "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-                if next_btns:
-                    safe_click(drv, next_btns[0])
-                    gui_print("➡️ Moved to next customer via carousel.")
-                    time.sleep(1.2)
-                else:
-                    gui_print("No more customers in carousel/list. Halting.", status="Auto-Claimed-Outreach stopped")
-                    break
+            gui_print(f"Parallel worker error: {exc}")
+            logger.debug(traceback.format_exc())
+            if _session_state(drv) == "dead":
+                gui_print("This tab's Chrome has gone away; tab stopped.")
+                break
+            send_governor.customer_done(type(exc).__name__)
+            errors += 1
+            if errors < int(settings["customer_attempts"]):
                 continue
-            email_sent = False
-            if customer_has_email(drv):
-                try:
-                    email_sent = send_email_message(drv)
-                    if email_sent:
-                        gui_print("Email sent for claimed customer.")
-                except Exception as exc:
-                    gui_print(f"Email error: {exc}")
+            gui_print(f"Giving up on this customer after {errors} errors.")
+            held, errors = None, 0
             try:
-                send_text_message(drv)
-            except Exception as exc:
-                gui_print(f"Text error: {exc}")
-            next_btns = drv.find_elements(By.XPATH, "//*[contains(@analyticsdetect,'Carousel|Navigate|Right')]")
-            if next_btns:
-                safe_click(drv, next_btns[0])
-                gui_print("➡️ Moved to next customer via carousel.")
-                time.sleep(1.2)
-            else:
-                gui_print("No more customers in carousel/list. Halting.", status="Auto-Claimed-Outreach stopped")
+                if not advance_to_next_customer(drv):
+                    break
+            except Exception:
                 break
-        except Exception as exc:
-            gui_print(f"Error in auto-claimed outreach: {exc}")
-            logger.debug(traceback.format_exc())
-            time.sleep(1)
-    gui_print("Auto Claimed-Only Outreach stopped.")
-    status_var.set("Ready")
+    watch.report()
+
+@scheduled("Parallel auto-process", PRIORITY_AUTO)
+def auto_process_parallel(workers: int | None = None) -> int:
+    # Returns how many customers the tabs processed between them.
+    workers = max(1, int(workers or settings["parallel_workers"]))
+    missing = missing_templates(AUTO_MODES["auto_process"])
+    if missing:
+        gui_print(f"Parallel auto-process not started: template(s) {', '.join(missing)} are empty.",
+                  status="Template missing")
+        return 0
+    gui_print(f"Parallel auto-process started on {workers} tabs (STOP to halt).", status="Parallel auto-process")
+    begin_stats_run("auto_process_parallel")
+    tabs = _prepare_worker_tabs(workers)
+    if not tabs:
+        set_status("Ready")
+        return 0
+    if len(tabs) < workers:
+        gui_print(f"Only {len(tabs)} of {workers} tabs could be attached; continuing with those.")
+    send_governor.reset()
+    reset_checkpoints()
+    auto_stop_event.clear()
+    index = prescan_carousel(tabs[0][0]) if settings["prescan"] else None
+    if index is not None:
+        plan = index.plan(AUTO_MODES["auto_process"])
+        gui_print(f"{len(index.entries)} customers scanned, {len(plan)} shared between the tabs.")
+        work = CustomerWorkQueue(plan)
+    else:
+        work = CustomerWorkQueue()
+    started = time.monotonic()
+    threads = [threading.Thread(target=_parallel_worker, args=(i, drv, work),
+                                name=f"tab-{i + 1}", daemon=True)
+               for i, (drv, _, _) in enumerate(tabs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for drv, _, opened in tabs:
+        try:
+            if opened:
+                drv.close()
+            drv.quit()
+        except Exception:
+            pass
+    minutes = max((time.monotonic() - started) / 60, 1e-9)
+    gui_print(f"Parallel auto-process stopped. {work.processed} customers in "
+              f"{minutes:.1f} min ({work.processed / minutes:.1f}/min).")
+    log_stage_summary()
+    set_status("Ready")
+    return work.processed
+
+def parallel_auto_gui():
+    n = simpledialog.askinteger("Parallel Auto", "Number of DriveCentric tabs to run:",
+                                initialvalue=settings["parallel_workers"],
+                                minvalue=1, maxvalue=12, parent=root)
+    if not n:
+        return
+    settings["parallel_workers"] = n
+    save_settings()
+    auto_process_parallel(n)
 
 def get_numeric_version(v: str) -> float:
     try: return float(v)
@@ -1243,65 +3309,213 @@ def get_current_version() -> str:
     except Exception:
         return DEFAULT_VERSION
 
-def check_for_update():
-    api = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/releases/latest"
-    gui_print(f"Checking updates at {api} ...", status="Checking update")
+# ---- Self-update ----
+# Release metadata is requested with If-None-Match against the cached ETag, so
+# a repeat check is answered with 304 and does not count against GitHub's rate
+# limit. The zip is streamed to a .part file, which a later check resumes with
+# a Range request, and is verified against the release's sha256 (the asset
+# digest GitHub publishes, or a "<zip>.sha256" asset) before anything is
+# touched. Only members whose size or CRC differs from the installed file are
+# written, each through a temp file and os.replace.
+
+UPDATE_API_URL = os.environ.get("DRIVECENTRIC_UPDATE_API",
+                                f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}/releases/latest")
+UPDATE_DIR = USER_DATA_DIR / "update"
+UPDATE_CHUNK = 64 * 1024
+
+def _release_cache_file() -> Path:
+    return UPDATE_DIR / "release_cache.json"
+
+def fetch_release_info(session) -> dict:
     try:
-        data = requests.get(api, timeout=10).json()
+        cache = json.loads(_release_cache_file().read_text(encoding="utf-8"))
+    except Exception:
+        cache = {}
+    headers = {"Accept": "application/vnd.github+json"}
+    if cache.get("url") == UPDATE_API_URL and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+    resp = session.get(UPDATE_API_URL, headers=headers, timeout=10)
+    if resp.status_code == 304:
+        logger.info("Release metadata unchanged (ETag %s)", cache["etag"])
+        return cache["data"]
+    resp.raise_for_status()
+    data = resp.json()
+    UPDATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = _release_cache_file().with_suffix(".tmp")
+    tmp.write_text(json.dumps({"url": UPDATE_API_URL, "etag": resp.headers.get("ETag"), "data": data}),
+                   encoding="utf-8")
+    os.replace(tmp, _release_cache_file())
+    return data
+
+def _release_sha256(session, assets: list, asset: dict) -> str | None:
+    digest = asset.get("digest") or ""
+    if digest.startswith("sha256:"):
+        return digest.split(":", 1)[1].lower()
+    side = next((a for a in assets if a["name"] == asset["name"] + ".sha256"), None)
+    if not side:
+        return None
+    resp = session.get(side["browser_download_url"], timeout=10)
+    resp.raise_for_status()
+    return resp.text.split()[0].lower()
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(UPDATE_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def download_release_asset(session, url: str, dest: Path, size: int | None = None):
+    part = dest.with_name(dest.name + ".part")
+    have = part.stat().st_size if part.exists() else 0
+    if size and have >= size:
+        os.replace(part, dest)
+        return
+    headers = {"Accept": "application/octet-stream"}
+    if have:
+        headers["Range"] = f"bytes={have}-"
+    with session.get(url, headers=headers, stream=True, timeout=30) as resp:
+        resp.raise_for_status()
+        if have and resp.status_code != 206:
+            have = 0
+        if have:
+            gui_print(f"Resuming download at {have / 1e6:.1f} MB.")
+        total = size or (have + int(resp.headers.get("Content-Length", 0))) or None
+        done, t0, shown = have, time.monotonic(), 0.0
+        with part.open("ab" if have else "wb") as fp:
+            for chunk in resp.iter_content(UPDATE_CHUNK):
+                fp.write(chunk)
+                done += len(chunk)
+                now = time.monotonic()
+                if now - shown >= 0.25:
+                    shown = now
+                    pct = f" {done * 100 // total}%" if total else ""
+                    set_status(f"Downloading update{pct} ({done / 1e6:.1f} MB)")
+    secs = max(time.monotonic() - t0, 1e-9)
+    gui_print(f"Downloaded {done / 1e6:.1f} MB ({(done - have) / 1e6 / secs:.1f} MB/s).")
+    os.replace(part, dest)
+
+def _member_unchanged(info: zipfile.ZipInfo, dst: Path) -> bool:
+    if not dst.is_file() or dst.stat().st_size != info.file_size:
+        return False
+    crc = 0
+    with dst.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(UPDATE_CHUNK), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc == info.CRC
+
+def apply_update_zip(zip_path: Path, target: Path) -> tuple[int, int]:
+    changed = unchanged = 0
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            rel = Path(info.filename)
+            if info.is_dir() or rel.is_absolute() or ".." in rel.parts:
+                continue
+            dst = target / rel
+            if _member_unchanged(info, dst):
+                unchanged += 1
+                continue
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dst.with_name(dst.name + ".update")
+            with zf.open(info) as src, tmp.open("wb") as out:
+                shutil.copyfileobj(src, out, UPDATE_CHUNK)
+            os.replace(tmp, dst)
+            logger.info("Updated %s", rel)
+            changed += 1
+    return changed, unchanged
+
+def check_for_update(confirm: Callable[[str], bool] | None = None, target: Path | None = None):
+    import requests
+    confirm = confirm or (lambda remote: messagebox.askyesno("Update", f"Update {remote} available. Download?"))
+    target = target or Path.cwd()
+    gui_print(f"Checking updates at {UPDATE_API_URL} ...", status="Checking update")
+    session = requests.Session()
+    try:
+        data = fetch_release_info(session)
     except Exception as exc:
         gui_print(f"Update check failed: {exc}")
-        status_var.set("Ready")
+        set_status("Ready")
         return False
     remote = data.get("tag_name", "").lstrip("v")
     local = get_current_version()
     if get_numeric_version(remote) <= get_numeric_version(local):
         gui_print("No update available.")
-        status_var.set("Ready")
+        set_status("Ready")
         return False
-    if not messagebox.askyesno("Update", f"Update {remote} available. Download?"):
-        status_var.set("Ready")
+    if not confirm(remote):
+        set_status("Ready")
         return False
-    zip_url = next((a["browser_download_url"]
-        for a in data.get("assets", [])
-        if a["name"].endswith(".zip")), None)
-    if not zip_url:
+    assets = data.get("assets", [])
+    asset = next((a for a in assets if a["name"].endswith(".zip")), None)
+    if not asset:
         gui_print("Release has no .zip asset.")
-        status_var.set("Ready")
+        set_status("Ready")
         return False
-    gui_print(f"Downloading {zip_url} ...", status="Downloading update")
+    forcibly_remove_folder(USER_DATA_DIR / "update_tmp")
+    UPDATE_DIR.mkdir(parents=True, exist_ok=True)
+    zip_path = UPDATE_DIR / f"{remote}-{asset['name']}"
+    for stale in UPDATE_DIR.glob("*.zip*"):
+        if not stale.name.startswith(zip_path.name):
+            stale.unlink(missing_ok=True)
     try:
-        zdata = requests.get(zip_url, timeout=30).content
-        zf = zipfile.ZipFile(io.BytesIO(zdata))
+        expected = _release_sha256(session, assets, asset)
+        if not zip_path.exists():
+            gui_print(f"Downloading {asset['browser_download_url']} ...", status="Downloading update")
+            download_release_asset(session, asset["browser_download_url"], zip_path, asset.get("size"))
+        if expected:
+            actual = _file_sha256(zip_path)
+            if actual != expected:
+                zip_path.unlink(missing_ok=True)
+                raise ValueError(f"checksum mismatch (sha256 {actual[:12]}..., expected {expected[:12]}...)")
+            gui_print("Checksum verified.")
+        else:
+            with zipfile.ZipFile(zip_path) as zf:
+                bad = zf.testzip()
+            if bad:
+                zip_path.unlink(missing_ok=True)
+                raise ValueError(f"corrupt archive member {bad}")
+            gui_print("Release publishes no sha256; archive CRCs checked instead.")
     except Exception as exc:
         gui_print(f"Download failed: {exc}")
-        status_var.set("Ready")
+        set_status("Ready")
         return False
-    tmp = USER_DATA_DIR / "update_tmp"
-    forcibly_remove_folder(tmp)
-    tmp.mkdir(exist_ok=True)
-    zf.extractall(tmp)
-    for src in tmp.rglob("*"):
-        if src.is_file():
-            dst = Path.cwd() / src.relative_to(tmp)
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst)
-    gui_print("Update applied - restart program.")
-    forcibly_remove_folder(tmp)
-    status_var.set("Ready")
+    set_status("Applying update")
+    changed, unchanged = apply_update_zip(zip_path, target)
+    zip_path.unlink(missing_ok=True)
+    gui_print(f"Update applied ({changed} file(s) changed, {unchanged} unchanged) - restart program.")
+    set_status("Ready")
     return True
 
+_update_lock = threading.Lock()
+
 def manual_update_check():
-    if check_for_update():
-        root.quit()
+    # The download streams for a while; keep it off the Tk thread so the
+    # progress in the status bar is actually drawn.
+    if not _update_lock.acquire(blocking=False):
+        gui_print("An update check is already running.")
+        return
+    threading.Thread(target=_update_check_worker, name="update", daemon=True).start()
+
+def _update_check_worker():
+    try:
+        confirm = lambda remote: run_on_tk(
+            lambda: messagebox.askyesno("Update", f"Update {remote} available. Download?"))
+        if check_for_update(confirm=confirm):
+            run_on_tk(root.quit, wait=False)
+    finally:
+        _update_lock.release()
 
 def edit_templates_wrapper():
     threading.Thread(target=_edit_templates_worker, daemon=True).start()
 
 def _edit_templates_worker():
     def do_save():
-        for k, w in widgets.items():
-            templates[k] = w.get("1.0", tk.END).strip() if isinstance(w, tk.Text) else w.get().strip()
-        save_templates()
+        edited = {k: (w.get("1.0", tk.END).strip() if isinstance(w, tk.Text) else w.get().strip())
+                  for k, w in widgets.items()}
+        errors = save_templates(edited)
+        if errors:
+            messagebox.showerror("Template Editor", "Not saved:\n\n" + "\n".join(errors), parent=top)
+            return
         top.destroy()
     top = tk.Toplevel(root)
     top.title("Template Editor")
@@ -1314,13 +3528,14 @@ def _edit_templates_worker():
     canvas.create_window((0, 0), window=scroll_frame, anchor="nw")
     canvas.configure(yscrollcommand=scrollbar.set)
     widgets = {}
-    for key in sorted(templates.keys()):
+    current = get_templates()
+    for key in sorted(k for k, _ in current.items()):
         frm = ttk.Frame(scroll_frame); frm.pack(fill='x', pady=2, padx=6)
         ttk.Label(frm, text=key, width=30, anchor='w').pack(side=tk.LEFT)
         if key.endswith("_body") or key.endswith("_text"):
-            txt = tk.Text(frm, width=80, height=6); txt.insert(tk.END, templates[key])
+            txt = tk.Text(frm, width=80, height=6); txt.insert(tk.END, current[key])
         else:
-            txt = ttk.Entry(frm, width=80); txt.insert(0, templates[key])
+            txt = ttk.Entry(frm, width=80); txt.insert(0, current[key])
         txt.pack(side=tk.LEFT, expand=True, fill='x')
         widgets[key] = txt
     canvas.pack(side="left", fill="both", expand=True)
@@ -1329,14 +3544,74 @@ def _edit_templates_worker():
     top.grab_set()
     root.wait_window(top)
 
+def show_stage_stats():
+    top = tk.Toplevel(root)
+    top.title("Stage Timings")
+    top.geometry("760x320")
+    header = tk.StringVar()
+    ttk.Label(top, textvariable=header, anchor="w").pack(fill="x", padx=8, pady=4)
+    cols = ("count", "mean", "p50", "p95", "p99", "max", "histogram")
+    tree = ttk.Treeview(top, columns=cols, height=8)
+    tree.heading("#0", text="stage")
+    tree.column("#0", width=80)
+    for c in cols:
+        tree.heading(c, text=c)
+        tree.column(c, width=260 if c == "histogram" else 60, anchor="e")
+    tree.pack(fill="both", expand=True, padx=8)
+    bucket_txt = " | ".join([f"<={b:g}s" for b in STAGE_BUCKETS] + [">"])
+
+    def refresh():
+        tree.delete(*tree.get_children())
+        header.set(f"Run: {stage_stats.run or '-'}  since {stage_stats.started:%H:%M:%S}   buckets: {bucket_txt}")
+        for stage, st in stage_stats.summary().items():
+            tree.insert("", tk.END, text=stage, values=(
+                st["count"], *(f"{st[k]:.2f}" for k in ("mean", "p50", "p95", "p99", "max")),
+                " ".join(str(n) for n in st["histogram"])))
+        if top.winfo_exists():
+            top.after(2000, refresh)
+
+    exporters = {
+        "csv": ("stage_timings", stage_stats.export_csv),
+        "json": ("stage_timings", stage_stats.export_json),
+        "folded": ("webdriver_stacks", command_profiler.export_folded),
+        "wd.json": ("webdriver_commands", command_profiler.export_json),
+    }
+
+    def export(kind: str):
+        stem, exporter = exporters[kind]
+        path = filedialog.asksaveasfilename(
+            parent=top, defaultextension=f".{kind}",
+            initialdir=str(USER_DATA_DIR),
+            initialfile=f"{stem}_{datetime.datetime.now():%Y%m%d_%H%M%S}.{kind}",
+            filetypes=[(kind.upper(), f"*.{kind}")])
+        if not path:
+            return
+        try:
+            exporter(path)
+            gui_print(f"{stem.replace('_', ' ').capitalize()} exported to {path}.")
+        except Exception as exc:
+            messagebox.showerror("Export failed", str(exc), parent=top)
+
+    btn_frm = ttk.Frame(top); btn_frm.pack(pady=6)
+    ttk.Button(btn_frm, text="Export CSV", command=lambda: export("csv")).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btn_frm, text="Export JSON", command=lambda: export("json")).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btn_frm, text="WebDriver Stacks", command=lambda: export("folded")).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btn_frm, text="WebDriver JSON", command=lambda: export("wd.json")).pack(side=tk.LEFT, padx=4)
+    ttk.Button(btn_frm, text="Close", command=top.destroy).pack(side=tk.LEFT, padx=4)
+    refresh()
+
 def stop_auto_process_gui():
     auto_stop_event.set()
+    dropped = action_scheduler.cancel(PRIORITY_AUTO)
+    if dropped:
+        gui_print(f"Dropped {dropped} queued auto run(s).")
     gui_print("Auto-process stop requested (via button).", status="Auto-process stop requested")
 
 def start_hotkey_thread():
     threading.Thread(target=_register_hotkeys, daemon=True).start()
 
 def _register_hotkeys():
+    import keyboard
     keyboard.add_hotkey("F8", claim_customer)
     keyboard.add_hotkey("ctrl+shift+F8", claim_customer)
     keyboard.add_hotkey("F9", send_text_wrapper)
@@ -1350,7 +3625,7 @@ def _register_hotkeys():
     keyboard.add_hotkey("ctrl+alt+x", auto_text_only_customers)
     keyboard.add_hotkey("ctrl+alt+m", auto_email_only_customers)
     keyboard.add_hotkey("ctrl+alt+z", auto_outreach_claimed_only) # new hotkey
-    keyboard.add_hotkey("ctrl+alt+q", auto_stop_event.set)
+    keyboard.add_hotkey("ctrl+alt+q", stop_auto_process_gui)
     keyboard.add_hotkey("ctrl+alt+p", edit_templates_wrapper)
     keyboard.add_hotkey("ctrl+alt*u", manual_update_check)
     keyboard.add_hotkey("ctrl+alt+n", auto_touchpoint_email_text_next)
@@ -1385,6 +3660,13 @@ def build_gui():
         ttk.Button(parent, text=lbl, width=w, command=cmd).pack(side=tk.LEFT, padx=3, pady=3)
     add_btn(top, "Launch Chrome", lambda: threading.Thread(
         target=launch_chrome, daemon=True).start(), 16)
+    chromes_var = tk.StringVar(value=str(settings["chrome_instances"]))
+    def set_chromes(*_):
+        if chromes_var.get().isdigit() and 1 <= int(chromes_var.get()) <= 8:
+            settings["chrome_instances"] = int(chromes_var.get())
+            save_settings()
+    ttk.Spinbox(top, from_=1, to=8, width=3, textvariable=chromes_var).pack(side=tk.LEFT, pady=3)
+    chromes_var.trace_add("write", set_chromes)
     add_btn(top, "Claim Only", claim_only_customer)
     add_btn(top, "Claim+Edit (F8)", claim_customer)
     add_btn(top, "Std Text (F9)", send_text_wrapper)
@@ -1399,6 +3681,27 @@ def build_gui():
     add_btn(top2, "Auto Text Only (Ctrl+Alt+X)", auto_text_only_customers)
     add_btn(top2, "Auto Email Only (Ctrl+Alt+M)", auto_email_only_customers)
     add_btn(top2, "Auto Outreach (claimed only)", auto_outreach_claimed_only, 24)
+    add_btn(top2, "Parallel Auto (N tabs)", parallel_auto_gui)
+    add_btn(top2, "Stage Timings", show_stage_stats)
+    cdp_var = tk.BooleanVar(value=settings["transport"] == "cdp")
+    def toggle_cdp():
+        settings["transport"] = "cdp" if cdp_var.get() else "selenium"
+        save_settings()
+        gui_print(f"Page transport for the next run: {settings['transport']}.")
+    ttk.Checkbutton(top2, text="CDP fast path", variable=cdp_var,
+                    command=toggle_cdp).pack(side=tk.LEFT, padx=3, pady=3)
+    prescan_var = tk.BooleanVar(value=bool(settings["prescan"]))
+    def toggle_prescan():
+        settings["prescan"] = prescan_var.get()
+        save_settings()
+    ttk.Checkbutton(top2, text="Pre-scan carousel", variable=prescan_var,
+                    command=toggle_prescan).pack(side=tk.LEFT, padx=3, pady=3)
+    profile_var = tk.BooleanVar(value=bool(settings["profile_webdriver"]))
+    def toggle_profile():
+        settings["profile_webdriver"] = profile_var.get()
+        save_settings()
+    ttk.Checkbutton(top2, text="Profile WebDriver", variable=profile_var,
+                    command=toggle_profile).pack(side=tk.LEFT, padx=3, pady=3)
     add_btn(top2, "Check Updates", manual_update_check)
     add_btn(top2, "STOP Auto Process", stop_auto_process_gui, 16)
     add_btn(top2, "Exit", root.quit, 10)
@@ -1406,24 +3709,155 @@ def build_gui():
     log_text.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
     status_var = tk.StringVar(value="Ready")
     status = ttk.Label(root, textvariable=status_var, relief=tk.SUNKEN, anchor='w')
+    root.after(LOG_FLUSH_MS, _flush_gui)
     status.pack(fill=tk.X, side=tk.BOTTOM)
     ttk.Label(root, text=f"{WATERMARK_ICON} {WATERMARK_TEXT} {WATERMARK_ICON}",
         foreground="gray50", font=("Segoe UI", 9, "italic"))\
         .pack(side=tk.BOTTOM, pady=2)
 
-def main():
+def _background_startup():
+    try:
+        load_templates()
+        startup_mark("templates loaded")
+        warm_up_browser()
+    except Exception as exc:
+        logger.warning(f"Background start-up step failed: {exc}")
+    log_startup_report()
+
+def _login_and_start():
     global sender_name
-    build_gui()
-    load_templates()
+    startup_mark("window shown")
     sender_name = gui_login()
     if not sender_name:
         root.quit(); return
     gui_print(f"Logged in as {sender_name}.", status="Ready")
     start_hotkey_thread()
     gui_print("Ready. Use buttons or hot-keys. Full Outreach -> F10.")
+
+def main():
+    load_settings()
+    startup_mark("settings")
+    build_gui()
+    startup_mark("gui built")
+    threading.Thread(target=_background_startup, name="startup", daemon=True).start()
+    # Login runs once the main loop has drawn the window.
+    root.after_idle(_login_and_start)
     root.mainloop()
+    chrome_fleet.stop()
+    close_chrome_session()
+
+# ---- Headless command line ----
+# python "Claim and task.py" --cli --pin 1234 --mode auto_process --limit 50
+# python "Claim and task.py" --cli --user "Jean Luc" --password ... --mode auto_process_parallel --workers 3
+# python "Claim and task.py" --cli --config overnight.json --json
+# Logs in with a username and password (--user / --password, the config's
+# "user" / "password", or DRIVECENTRIC_USER / DRIVECENTRIC_PASSWORD), checked
+# like the GUI login, or with an existing quick-PIN (--pin, "pin" or
+# DRIVECENTRIC_PIN). Works against an already attached Chrome. SIGINT /
+# SIGTERM stop the run after the current customer.
+PARALLEL_MODE = "auto_process_parallel"
+CLI_ACTIONS = {
+    "claim": claim_only_customer,
+    "claim_edit": claim_customer,
+    "text": send_text_wrapper,
+    "email": send_email_wrapper,
+    "custom_text": send_custom_text_wrapper,
+    "custom_email": send_custom_email_wrapper,
+    "full_outreach": full_outreach_wrapper,
+}
+
+def _cli_args(argv: list[str]):
+    import argparse
+    ap = argparse.ArgumentParser(prog="Claim and task.py",
+                                 description="Run DriveCentric-TaskClaim without the GUI.")
+    ap.add_argument("--cli", action="store_true", required=True)
+    ap.add_argument("--config", help="JSON file with any of the options below")
+    group = ap.add_mutually_exclusive_group()
+    group.add_argument("--mode", choices=sorted([*AUTO_MODES, PARALLEL_MODE]))
+    group.add_argument("--action", choices=sorted(CLI_ACTIONS))
+    ap.add_argument("--variant", help="custom template variant for custom_text / custom_email (A, B or C)")
+    ap.add_argument("--limit", type=int, help="stop after this many customers")
+    ap.add_argument("--workers", type=int, help=f"tabs for {PARALLEL_MODE} (default: parallel_workers setting)")
+    ap.add_argument("--minutes", type=float, help="stop after this many minutes")
+    ap.add_argument("--transport", choices=("selenium", "cdp"))
+    ap.add_argument("--prescan", action="store_true", default=None)
+    ap.add_argument("--user")
+    ap.add_argument("--password")
+    ap.add_argument("--pin")
+    ap.add_argument("--json", action="store_true", default=None, help="JSON lines on stdout")
+    args = ap.parse_args(argv)
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as fp:
+            for k, v in json.load(fp).items():
+                if getattr(args, k, None) is None:
+                    setattr(args, k, v)
+    if not (args.mode or args.action):
+        ap.error("one of --mode or --action is required (on the command line or in --config)")
+    if args.mode == PARALLEL_MODE and args.limit:
+        ap.error(f"--limit is not supported with {PARALLEL_MODE}; use --minutes")
+    return args
+
+def cli_main(argv: list[str]) -> int:
+    global sender_name, console_mode
+    import signal
+    args = _cli_args(argv)
+    console_mode = "json" if args.json else "text"
+    load_settings()
+    for key in ("transport", "prescan"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    user = args.user or os.environ.get("DRIVECENTRIC_USER")
+    if user:
+        refused = check_login(user, args.password or os.environ.get("DRIVECENTRIC_PASSWORD"))
+        if refused:
+            gui_print(f"Login failed: {refused}")
+            return 2
+        sender_name = user
+    else:
+        pin = args.pin or os.environ.get("DRIVECENTRIC_PIN")
+        matches = [u for u, p in load_pins().items() if pin and p == pin]
+        if len(matches) != 1:
+            gui_print("Login failed: pass --user and --password, or a quick-PIN set up in the GUI "
+                      "(--pin or DRIVECENTRIC_PIN).")
+            return 2
+        sender_name = matches[0]
+    gui_print(f"Logged in as {sender_name}.")
+    load_templates()
+    if not get_chrome_driver():
+        return 3
+
+    def _stop(signum, frame):
+        if auto_stop_event.is_set():
+            sys.exit(130)
+        gui_print("Stop requested; finishing the current customer.")
+        auto_stop_event.set()
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    if args.minutes:
+        timer = threading.Timer(args.minutes * 60, auto_stop_event.set)
+        timer.daemon = True
+        timer.start()
+    try:
+        if args.mode == PARALLEL_MODE:
+            auto_process_parallel.__wrapped__(args.workers)
+        elif args.mode:
+            run_auto_mode(args.mode, args.limit)
+        elif args.action in ("custom_text", "custom_email"):
+            if not args.variant:
+                gui_print(f"{args.action} needs --variant A, B or C.")
+                return 2
+            variant = args.variant.upper()
+            CLI_ACTIONS[args.action].__wrapped__(
+                f"custom_text_{variant}" if args.action == "custom_text" else variant)
+        else:
+            CLI_ACTIONS[args.action].__wrapped__()
+    finally:
+        close_chrome_session()
+    return 0
 
 if __name__ == "__main__":
+    if HEADLESS:
+        sys.exit(cli_main(sys.argv[1:]))
     try:
         main()
     except Exception as exc:
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the GitHub "latest release" API, for testing the updater.
+
+Serves the release metadata for a zip of --source (with an ETag, answering
+If-None-Match with 304), the zip itself (honouring Range requests) and a
+"<zip>.sha256" asset. Point "Claim and task.py" at it with
+
+    DRIVECENTRIC_UPDATE_API=http://127.0.0.1:8765/releases/latest
+
+    python bench/release_server.py --source path/to/build --tag v9.9
+    python bench/release_server.py --selftest    # end-to-end updater check
+
+--drop-after N cuts the first download after N bytes, to exercise resume.
+--selftest runs check_for_update against a scratch install three times:
+an interrupted download, a resumed one that must only rewrite the changed
+files, and a repeat check that must be served from the ETag cache.
+"""
+
+import os, sys, io, json, shutil, zipfile, hashlib, argparse, tempfile, threading
+import http.server
+from pathlib import Path
+
+ZIP_NAME = "DriveCentric-TaskClaim.zip"
+
+
+def build_zip(source: Path) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(source.rglob("*")):
+            if path.is_file():
+                zf.write(path, path.relative_to(source).as_posix())
+    return buf.getvalue()
+
+
+class ReleaseServer(http.server.ThreadingHTTPServer):
+    def __init__(self, payload: bytes, tag: str, port: int = 0, drop_after: int | None = None,
+                 publish_digest: bool = False):
+        super().__init__(("127.0.0.1", port), _ReleaseHandler)
+        self.payload = payload
+        self.sha256 = hashlib.sha256(payload).hexdigest()
+        self.tag = tag
+        self.drop_after = drop_after
+        self.publish_digest = publish_digest
+        self.hits = {"api": 0, "not_modified": 0, "zip": 0, "range": 0, "sha256": 0}
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def release_json(self) -> bytes:
+        asset = {"name": ZIP_NAME, "size": len(self.payload),
+                 "browser_download_url": f"{self.base}/assets/{ZIP_NAME}"}
+        assets = [asset]
+        if self.publish_digest:
+            asset["digest"] = f"sha256:{self.sha256}"
+        else:
+            assets.append({"name": ZIP_NAME + ".sha256", "size": 64,
+                           "browser_download_url": f"{self.base}/assets/{ZIP_NAME}.sha256"})
+        return json.dumps({"tag_name": self.tag, "assets": assets}).encode()
+
+
+class _ReleaseHandler(http.server.BaseHTTPRequestHandler):
+    server: ReleaseServer
+
+    def do_GET(self):
+        srv = self.server
+        if self.path == "/releases/latest":
+            body = srv.release_json()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            srv.hits["api"] += 1
+            if self.headers.get("If-None-Match") == etag:
+                srv.hits["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self._send(200, body, "application/json", {"ETag": etag})
+        elif self.path == f"/assets/{ZIP_NAME}.sha256":
+            srv.hits["sha256"] += 1
+            self._send(200, f"{srv.sha256}  {ZIP_NAME}\n".encode(), "text/plain")
+        elif self.path == f"/assets/{ZIP_NAME}":
+            srv.hits["zip"] += 1
+            self._send_zip()
+        else:
+            self.send_error(404)
+
+    def _send_zip(self):
+        srv = self.server
+        data, start = srv.payload, 0
+        rng = self.headers.get("Range", "")
+        if rng.startswith("bytes="):
+            start = int(rng[6:].split("-")[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.end_headers()
+                return
+            srv.hits["range"] += 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(data) - start))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        chunk = data[start:]
+        if srv.drop_after is not None:
+            chunk, srv.drop_after = chunk[:srv.drop_after], None
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(chunk)
+
+    def _send(self, code: int, body: bytes, ctype: str, headers: dict | None = None):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_release_server(payload: bytes, tag: str, **kw) -> ReleaseServer:
+    srv = ReleaseServer(payload, tag, **kw)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def selftest() -> int:
+    from run_bench import load_app
+    scratch = Path(tempfile.mkdtemp(prefix="dc_update_"))
+    try:
+        install, release = scratch / "install", scratch / "release"
+        files = {
+            "Claim and task.py": os.urandom(300_000).hex(),
+            "version.txt": "1.0\n",
+            "docs/README.txt": "unchanged\n",
+        }
+        for rel, text in files.items():
+            for root in (install, release):
+                (root / rel).parent.mkdir(parents=True, exist_ok=True)
+                (root / rel).write_text(text, encoding="utf-8")
+        (release / "version.txt").write_text("9.9\n", encoding="utf-8")
+        (release / "Claim and task.py").write_text(files["Claim and task.py"][::-1], encoding="utf-8")
+        (release / "bench").mkdir()
+        (release / "bench" / "new.txt").write_text("new file\n", encoding="utf-8")
+        payload = build_zip(release)
+        srv = start_release_server(payload, "v9.9", drop_after=len(payload) // 3)
+
+        app = load_app(scratch / "data")
+        app.console_mode = "text"
+        app.UPDATE_API_URL = f"{srv.base}/releases/latest"
+        app.UPDATE_DIR = scratch / "data" / "update"
+        readme_mtime = (install / "docs/README.txt").stat().st_mtime_ns
+
+        failures = []
+        def check(cond, what):
+            print(("  ok   " if cond else "  FAIL ") + what)
+            if not cond:
+                failures.append(what)
+
+        print("1. interrupted download")
+        applied = app.check_for_update(confirm=lambda remote: True, target=install)
+        part = next(app.UPDATE_DIR.glob("*.part"), None)
+        check(not applied, "update not applied")
+        check(part is not None and 0 < part.stat().st_size < len(payload), "partial download kept")
+
+        print("2. resumed download")
+        applied = app.check_for_update(confirm=lambda remote: True, target=install)
+        check(applied, "update applied")
+        check(srv.hits["range"] == 1, "download resumed with a Range request")
+        check(srv.hits["not_modified"] == 1, "metadata served from ETag cache")
+        for rel in ("Claim and task.py", "version.txt", "bench/new.txt", "docs/README.txt"):
+            check((install / rel).read_bytes() == (release / rel).read_bytes(), f"{rel} matches release")
+        check((install / "docs/README.txt").stat().st_mtime_ns == readme_mtime, "unchanged file not rewritten")
+        check(not any(app.UPDATE_DIR.glob("*.zip*")), "download removed after applying")
+
+        print("3. repeat check")
+        asked = []
+        app.check_for_update(confirm=lambda remote: asked.append(remote) or False, target=install)
+        check(asked == ["9.9"] and srv.hits["not_modified"] == 2, "metadata served from ETag cache again")
+        srv.shutdown()
+        print("OK" if not failures else f"{len(failures)} check(s) failed")
+        return 1 if failures else 0
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--source", type=Path, help="directory to serve as the release zip")
+    ap.add_argument("--tag", default="v9.9")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--drop-after", type=int, metavar="N")
+    ap.add_argument("--digest", action="store_true", help="publish the sha256 as an asset digest instead of a .sha256 asset")
+    ap.add_argument("--selftest", action="store_true")
+    args = ap.parse_args(argv)
+    if args.selftest:
+        return selftest()
+    if not args.source:
+        ap.error("--source is required unless --selftest is given")
+    srv = ReleaseServer(build_zip(args.source), args.tag, port=args.port,
+                        drop_after=args.drop_after, publish_digest=args.digest)
+    print(f"Serving {args.source} as {args.tag} at {srv.base}/releases/latest (sha256 {srv.sha256})")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""
+Offline throughput benchmark for DriveCentric-TaskClaim.
+
+Serves mock_drivecentric.html (a scripted stand-in for the DriveCentric
+customer page) on localhost, starts a headless Chrome with remote debugging
+on port 9222 - the port "Claim and task.py" attaches to - and runs each auto
+mode synchronously against it. No live customer is ever touched.
+
+For every mode it reports customers/minute and the per-stage p50/p95/p99
+timings. With --save-baseline the results are written to baselines.json;
+otherwise they are compared against it and the run exits with status 1 when
+throughput drops, or a stage's p95 grows, by more than --tolerance.
+
+    python bench/run_bench.py                      # all modes, compare
+    python bench/run_bench.py --modes auto_process --customers 40 --latency 300
+    python bench/run_bench.py --save-baseline
+    python bench/run_bench.py --transport cdp       # DevTools fast path
+    python bench/run_bench.py --prescan             # plan runs from a carousel pre-scan
+    python bench/run_bench.py --modes auto_process auto_process_parallel --workers 4
+
+auto_process_parallel runs one window per worker (--workers, default 3) and
+is reported as "auto_process_parallel xN", so its customers/minute can be set
+against auto_process to see how throughput scales with the worker count.
+"""
+
+import os, sys, json, time, shutil, socket, argparse, tempfile, threading, subprocess
+import importlib.util
+import http.server
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+APP_SCRIPT = REPO_DIR / "Claim and task.py"
+MOCK_PAGE = BENCH_DIR / "mock_drivecentric.html"
+BASELINE_FILE = BENCH_DIR / "baselines.json"
+DEBUG_PORT = 9222
+
+# bench name -> auto-mode function in "Claim and task.py"
+MODES = {
+    "auto_process": "auto_process_customers",
+    "touchpoint_email_text": "auto_touchpoint_email_text_next",
+    "text_only": "auto_text_only_customers",
+    "email_only": "auto_email_only_customers",
+    "claimed_outreach": "auto_outreach_claimed_only",
+    "auto_process_parallel": "auto_process_parallel",
+}
+PARALLEL_MODE = "auto_process_parallel"
+
+CHROME_CANDIDATES = [
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+]
+
+
+class _MockHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if not self.path.startswith("/drivecentric/"):
+            self.send_error(404)
+            return
+        body = MOCK_PAGE.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server() -> http.server.ThreadingHTTPServer:
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _MockHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def port_open(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(0.2)
+        return s.connect_ex(("127.0.0.1", port)) == 0
+
+
+def find_chrome(explicit: str | None) -> str:
+    for cand in ([explicit] if explicit else CHROME_CANDIDATES):
+        path = cand if os.path.isfile(cand) else shutil.which(cand)
+        if path:
+            return path
+    sys.exit("Chrome not found; pass --chrome PATH.")
+
+
+def launch_headless_chrome(chrome: str, profile: Path) -> subprocess.Popen:
+    if port_open(DEBUG_PORT):
+        sys.exit(f"Port {DEBUG_PORT} is already in use - close the Chrome you work in before benchmarking.")
+    proc = subprocess.Popen([
+        chrome, "--headless=new", f"--remote-debugging-port={DEBUG_PORT}",
+        f"--user-data-dir={profile}", "--no-first-run", "--no-default-browser-check",
+        "--window-size=1280,900", "about:blank",
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 20
+    while not port_open(DEBUG_PORT):
+        if time.monotonic() > deadline or proc.poll() is not None:
+            proc.kill()
+            sys.exit("Headless Chrome did not open its debugging port.")
+        time.sleep(0.1)
+    return proc
+
+
+def load_app(data_dir: Path):
+    # Point the app's user-data folder (ledger, settings, logs) at a scratch dir
+    # before it is imported, so benchmarks never touch the real one.
+    os.environ["LOCALAPPDATA"] = str(data_dir)
+    os.environ["HOME"] = str(data_dir)
+    spec = importlib.util.spec_from_file_location("claim_and_task", APP_SCRIPT)
+    app = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = app
+    spec.loader.exec_module(app)
+    app.sender_name = "Bench Runner"
+    app.settings["ledger_skip_hours"] = 0
+    return app
+
+
+def run_mode(app, ctl, start_url: str, mode: str, timeout: float, workers: int) -> dict:
+    ctl.get(f"{start_url}&run={mode}")
+    fn = getattr(app, MODES[mode]).__wrapped__
+    watchdog = threading.Timer(timeout, app.auto_stop_event.set)
+    watchdog.daemon = True
+    watchdog.start()
+    t0 = time.perf_counter()
+    try:
+        processed = fn(workers) if mode == PARALLEL_MODE else fn()
+    finally:
+        watchdog.cancel()
+    elapsed = time.perf_counter() - t0
+    page = ctl.execute_script("return window.__mockStats();")
+    # Each worker window keeps its own mock state, so the first window's page
+    # counts only cover one worker; the app's own count covers them all.
+    customers = processed if mode == PARALLEL_MODE else page["visited"]
+    return {
+        "seconds": round(elapsed, 2),
+        "customers": customers,
+        "customers_per_min": round(customers / elapsed * 60, 2),
+        "timed_out": elapsed >= timeout,
+        "page": page,
+        "stages": {k: {m: round(v, 3) for m, v in st.items() if m in ("count", "p50", "p95", "p99", "mean")}
+                   for k, st in app.stage_stats.summary().items()},
+    }
+
+
+def baseline_key(mode: str, variant: str) -> str:
+    return mode if variant == "selenium" else f"{mode} [{variant}]"
+
+
+def compare(results: dict, baselines: dict, config: dict, variant: str, tolerance: float) -> list[str]:
+    failures = []
+    for mode, res in results.items():
+        base = baselines.get(baseline_key(mode, variant))
+        if not base:
+            print(f"  {mode}: no baseline recorded (run with --save-baseline)")
+            continue
+        if base.get("config") != config:
+            print(f"  {mode}: baseline was recorded with {base.get('config')}; not comparable")
+            continue
+        floor = base["customers_per_min"] * (1 - tolerance)
+        if res["customers_per_min"] < floor:
+            failures.append(f"{mode}: {res['customers_per_min']} customers/min < baseline "
+                            f"{base['customers_per_min']} (-{tolerance:.0%} allowed)")
+        for stage, st in res["stages"].items():
+            bst = base.get("stages", {}).get(stage)
+            if bst and bst["p95"] > 0 and st["p95"] > bst["p95"] * (1 + tolerance):
+                failures.append(f"{mode}/{stage}: p95 {st['p95']}s > baseline {bst['p95']}s "
+                                f"(+{tolerance:.0%} allowed)")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+    ap.add_argument("--customers", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=3, help=f"windows for {PARALLEL_MODE}")
+    ap.add_argument("--latency", type=int, default=150, help="mock UI latency per action, ms")
+    ap.add_argument("--jitter", type=float, default=0.3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=600, help="per-mode time limit, s")
+    ap.add_argument("--tolerance", type=float, default=0.15)
+    ap.add_argument("--transport", choices=("selenium", "cdp"), default="selenium")
+    ap.add_argument("--prescan", action="store_true", help="pre-scan the carousel and plan each run")
+    ap.add_argument("--chrome")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--json", metavar="PATH", help="also write the results to this file")
+    args = ap.parse_args(argv)
+
+    config = {"customers": args.customers, "latency": args.latency,
+              "jitter": args.jitter, "seed": args.seed}
+    transport = args.transport
+    variant = transport + ("+prescan" if args.prescan else "")
+    scratch = Path(tempfile.mkdtemp(prefix="dc_bench_"))
+    srv = start_mock_server()
+    chrome = launch_headless_chrome(find_chrome(args.chrome), scratch / "profile")
+    results = {}
+    try:
+        app = load_app(scratch / "data")
+        app.settings["transport"] = transport
+        app.settings["prescan"] = args.prescan
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        opts = Options()
+        opts.debugger_address = f"127.0.0.1:{DEBUG_PORT}"
+        ctl = webdriver.Chrome(options=opts)
+        query = "&".join(f"{k}={v}" for k, v in config.items())
+        start_url = f"http://127.0.0.1:{srv.server_port}/drivecentric/customer/1000?{query}"
+        for mode in args.modes:
+            label = f"{mode} x{args.workers}" if mode == PARALLEL_MODE else mode
+            print(f"Running {label} ...", flush=True)
+            results[label] = res = run_mode(app, ctl, start_url, mode, args.timeout, args.workers)
+            print(f"  {res['customers']} customers in {res['seconds']}s "
+                  f"= {res['customers_per_min']} customers/min"
+                  + ("  (TIMED OUT)" if res["timed_out"] else ""))
+            for stage, st in res["stages"].items():
+                print(f"    {stage:<8} n={st['count']:<4} p50 {st['p50']:.2f}  p95 {st['p95']:.2f}  p99 {st['p99']:.2f}")
+        app.close_chrome_session()
+        ctl.quit()
+    finally:
+        chrome.kill()
+        srv.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"config": config, "variant": variant, "results": results}, indent=2), encoding="utf-8")
+    baselines = json.loads(BASELINE_FILE.read_text(encoding="utf-8")) if BASELINE_FILE.is_file() else {}
+    if args.save_baseline:
+        for mode, res in results.items():
+            baselines[baseline_key(mode, variant)] = {"config": config, "customers_per_min": res["customers_per_min"],
+                               "stages": res["stages"]}
+        BASELINE_FILE.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baselines saved to {BASELINE_FILE}.")
+        return 0
+    print("Comparison with baselines:")
+    failures = compare(results, baselines, config, variant, args.tolerance)
+    for f in failures:
+        print(f"  REGRESSION {f}")
+    if not failures:
+        print("  OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())